@@ -1,11 +1,21 @@
+import tempfile
 from datetime import datetime, time, timedelta
 
 import pandas as pd
 from django import forms
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
 from django.core.files.uploadedfile import InMemoryUploadedFile
-
-from .models import Menu
+from django.http import FileResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.urls import path
+
+from .models import Dish, History
+from .reports import (
+    get_deduction_report,
+    iterate_deduction_report_csv,
+    iterate_deduction_report_rows,
+    write_deduction_report_xlsx,
+)
 from .tasks import upload_menu_task
 from .utils import (
     validate_column_names_correspondence,
@@ -14,14 +24,14 @@ from .utils import (
     validate_file_extension,
     validate_file_size,
 )
-from .values import ViewSettingValues
+from .values import ReportSettingValues, ViewSettingValues
 
 
 class UploadMenuForm(forms.ModelForm):
     file = forms.FileField(required=True)
 
     class Meta:
-        model = Menu
+        model = Dish
         fields = ["file"]
 
     def clean_file(self) -> InMemoryUploadedFile:
@@ -45,15 +55,18 @@ class UploadMenuForm(forms.ModelForm):
         return uploaded_file
 
 
-@admin.register(Menu)
+@admin.register(Dish)
 class UploadedMenuAdmin(admin.ModelAdmin):
     form = UploadMenuForm
+    list_display = ("name", "course_type", "price", "menu_version")
+    list_filter = ("menu_version", "course_type")
+    ordering = ("-menu_version", "course_type", "position")
 
     def save_model(self, request, obj, form, change):
         """
         Overriding the save_model method to handle the uploaded file
         :param request: HttpRequest
-        :param obj: Menu
+        :param obj: Dish
         :param form: UploadMenuForm
         :param change: bool
         :return: None
@@ -103,3 +116,56 @@ class UploadedMenuAdmin(admin.ModelAdmin):
         time_difference = last_weekday - today
 
         return int(time_difference.total_seconds())
+
+
+@admin.register(History)
+class HistoryAdmin(admin.ModelAdmin):
+    list_display = ("date", "user", "total_amount")
+    list_select_related = ("user",)
+    date_hierarchy = "date"
+    search_fields = ("user__email",)
+    ordering = ("-date",)
+    change_list_template = "admin/smakolyk/history/change_list.html"
+
+    def get_urls(self):
+        return [
+            path(
+                "deduction-report/",
+                self.admin_site.admin_view(self.deduction_report_view),
+                name="smakolyk_history_deduction_report",
+            ),
+        ] + super().get_urls()
+
+    def deduction_report_view(self, request):
+        """
+        Streams the monthly payroll deduction report, rows are read from the DB
+        in chunks while the response is sent
+        :param request: HttpRequest
+        :return: StreamingHttpResponse
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        report_format = request.GET.get("format", "csv")
+
+        if report_format not in ReportSettingValues.FORMATS:
+            return HttpResponseBadRequest("Invalid report format")
+
+        file_name = ReportSettingValues.DEDUCTION_REPORT_FILE_NAME.format(
+            format=report_format
+        )
+        rows = iterate_deduction_report_rows(get_deduction_report())
+
+        if report_format == "csv":
+            return StreamingHttpResponse(
+                iterate_deduction_report_csv(rows),
+                content_type="text/csv",
+                headers={"Content-Disposition": f'attachment; filename="{file_name}"'},
+            )
+
+        # An XLSX file is a zip archive, so it's built in a temporary file first
+        file = tempfile.TemporaryFile()
+        write_deduction_report_xlsx(rows, file)
+        file.seek(0)
+
+        return FileResponse(file, as_attachment=True, filename=file_name)
@@ -0,0 +1,310 @@
+import hashlib
+import json
+import os
+import tempfile
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max
+
+from .models import Dish
+from .values import (
+    MENU_ARTIFACT_DIR_NAME,
+    MENU_ARTIFACT_FILE_NAME,
+    MENU_ARTIFACT_FILE_PATTERN,
+    MENU_ARTIFACT_POINTER_FILE_NAME,
+    MENU_VERSION_LOCK_ID,
+    CacheSettingValues,
+    DataMappingValues,
+    ViewSettingValues,
+)
+
+# Snapshot of the current menu held in this process' memory
+_catalog: "MenuCatalog | None" = None
+
+
+@dataclass(frozen=True)
+class MenuCatalog:
+    """
+    Immutable snapshot of the menu, built from a single query per menu version
+    """
+
+    version: str
+    digest: str
+    dishes: dict[str, tuple[str, ...]]
+    prices: dict[str, dict[str, int]]
+    price_index: dict[tuple[str, str], int]
+    dish_ids: dict[tuple[str, str], uuid.UUID]
+
+    @classmethod
+    def build(cls, version: str) -> "MenuCatalog":
+        """
+        Reads dishes of the current menu version from the DB in one query
+        :param version: str
+        :return: MenuCatalog
+        """
+        return cls.from_dishes(
+            version,
+            Dish.objects.current()
+            .order_by("course_type", "position")
+            .values_list("course_type", "name", "price", "id"),
+        )
+
+    @classmethod
+    def from_dishes(
+        cls, version: str, rows: Iterable[tuple[str, str, int, uuid.UUID]]
+    ) -> "MenuCatalog":
+        """
+        Builds a catalog from (course_type, name, price, id) rows
+        :param version: str
+        :param rows: Iterable[tuple[str, str, int, uuid.UUID]]
+        :return: MenuCatalog
+        """
+        dishes: dict[str, list[str]] = {
+            field_name: list() for field_name in DataMappingValues.dish_field_names
+        }
+        prices: dict[str, dict[str, int]] = {
+            field_name: dict() for field_name in DataMappingValues.dish_field_names
+        }
+        price_index: dict[tuple[str, str], int] = dict()
+        dish_ids: dict[tuple[str, str], uuid.UUID] = dict()
+
+        for course_type, name, price, dish_id in rows:
+            dishes[course_type].append(name)
+            prices[course_type][name] = price
+            price_index[(course_type, name)] = price
+            dish_ids[(course_type, name)] = dish_id
+
+        return cls(
+            version=version,
+            digest=hashlib.sha256(
+                json.dumps([dishes, prices], sort_keys=True).encode()
+            ).hexdigest(),
+            dishes={key: tuple(value) for key, value in dishes.items()},
+            prices=prices,
+            price_index=price_index,
+            dish_ids=dish_ids,
+        )
+
+    @cached_property
+    def choices(self) -> dict[str, tuple]:
+        """
+        Returns choices for `forms.ChoiceField` of every course
+        :return: dict[str, tuple]
+        """
+        return {
+            field_name: tuple(
+                [("", "Select a dish")]
+                + [(value_, value_) for value_ in self.dishes[field_name]]
+            )
+            for field_name in DataMappingValues.dish_field_names
+        }
+
+    def get_choices(self, field_name: str) -> tuple:
+        """
+        Returns a tuple of choices for `forms.ChoiceField` based on `field_name`
+        :param field_name: str
+        :return: tuple
+        """
+        return self.choices[field_name]
+
+    def get_chunks(self, field_name: str, size: int) -> list[tuple[str, ...]]:
+        """
+        Splits dishes of `field_name` into chunks of `size`
+        :param field_name: str
+        :param size: int
+        :return: list[tuple[str, ...]]
+        """
+        dishes = self.dishes[field_name]
+
+        return [dishes[i : i + size] for i in range(0, len(dishes), size)]
+
+    @cached_property
+    def carousel(self) -> dict[str, list[tuple[str, ...]]]:
+        """
+        Returns dishes of every course split into carousel slides
+        :return: dict[str, list[tuple[str, ...]]]
+        """
+        return {
+            field_name: self.get_chunks(field_name, ViewSettingValues.CHUNK_MENU_SIZE)
+            for field_name in DataMappingValues.dish_field_names
+        }
+
+    def as_dict(self) -> dict:
+        """
+        Returns the catalog content as a JSON serializable dict
+        :return: dict
+        """
+        return {
+            "digest": self.digest,
+            "dishes": self.dishes,
+            "prices": self.prices,
+            "carousel": self.carousel,
+        }
+
+    def get_price(self, field_name: str, dish: str) -> int | None:
+        """
+        Returns price of a dish or None if there is no such dish in the menu
+        :param field_name: str
+        :param dish: str
+        :return: int | None
+        """
+        return self.price_index.get((field_name, dish))
+
+    def get_dish_id(self, field_name: str, dish: str) -> uuid.UUID | None:
+        """
+        Returns id of a dish or None if there is no such dish in the menu
+        :param field_name: str
+        :param dish: str
+        :return: uuid.UUID | None
+        """
+        return self.dish_ids.get((field_name, dish))
+
+
+def get_menu_version() -> str:
+    """
+    Returns current menu version shared by all workers through the cache
+    :return: str
+    """
+    if (version := cache.get(CacheSettingValues.MENU_VERSION_KEY)) is None:
+        cache.add(
+            CacheSettingValues.MENU_VERSION_KEY,
+            uuid.uuid4().hex,
+            timeout=CacheSettingValues.NO_TIMEOUT,
+        )
+        version = cache.get(CacheSettingValues.MENU_VERSION_KEY)
+
+    return version
+
+
+def bump_menu_version() -> None:
+    """
+    Makes every worker rebuild its menu catalog on the next read
+    :return: None
+    """
+    cache.set(
+        CacheSettingValues.MENU_VERSION_KEY,
+        uuid.uuid4().hex,
+        timeout=CacheSettingValues.NO_TIMEOUT,
+    )
+
+
+def invalidate_menu_catalog() -> None:
+    """
+    Bumps the menu version now and once more after the current transaction commits
+    :return: None
+    """
+    # Bumping right away makes the change visible inside the current transaction,
+    # bumping after commit drops snapshots other workers built in the meantime
+    bump_menu_version()
+    transaction.on_commit(bump_menu_version)
+
+
+def save_menu(rows: Iterable[dict], invalidate: bool = True) -> int:
+    """
+    Saves menu rows in the uploaded file format as a new menu version.
+    Every row holds one dish of each course, see `ValidationValues.ALL_FILE_FIELDS`.
+    Without `invalidate` cached catalogs aren't dropped, for menus that are
+    rolled back before anyone reads them
+    :param rows: Iterable[dict]
+    :param invalidate: bool
+    :return: int
+    """
+    with transaction.atomic():
+        # Concurrent uploads would read the same latest version, so they take
+        # turns until the end of the transaction
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [MENU_VERSION_LOCK_ID])
+
+        version = (
+            Dish.objects.aggregate(version=Max("menu_version"))["version"] or 0
+        ) + 1
+
+        Dish.objects.bulk_create(
+            Dish(
+                course_type=field_name,
+                name=row.get(field_name, ""),
+                price=row.get(price_field_name, None),
+                position=position,
+                menu_version=version,
+            )
+            for position, row in enumerate(rows)
+            for field_name, price_field_name in zip(
+                DataMappingValues.dish_field_names,
+                DataMappingValues.dish_price_field_names,
+            )
+        )
+        if invalidate:
+            invalidate_menu_catalog()
+
+    return version
+
+
+def get_menu_catalog() -> MenuCatalog:
+    """
+    Returns the menu catalog of the current version, rebuilding it if it's outdated
+    :return: MenuCatalog
+    """
+    global _catalog
+
+    version = get_menu_version()
+
+    if _catalog is None or _catalog.version != version:
+        _catalog = MenuCatalog.build(version)
+
+    return _catalog
+
+
+def _write_file_atomically(path: Path, content: str) -> None:
+    """
+    Writes `content` to `path` so readers never see a partially written file
+    :param path: Path
+    :param content: str
+    :return: None
+    """
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, suffix=".tmp", delete=False
+    ) as temp_file:
+        temp_file.write(content)
+
+    os.chmod(temp_file.name, 0o644)
+    os.replace(temp_file.name, path)
+
+
+def publish_menu_artifact() -> str:
+    """
+    Writes the current menu catalog to a content-hashed JSON file under MEDIA_ROOT
+    and points `current.json` to it, so the web server can serve menu data itself
+    :return: str
+    """
+    catalog = get_menu_catalog()
+    directory = Path(settings.MEDIA_ROOT) / MENU_ARTIFACT_DIR_NAME
+    directory.mkdir(parents=True, exist_ok=True)
+
+    pointer_path = directory / MENU_ARTIFACT_POINTER_FILE_NAME
+    file_name = MENU_ARTIFACT_FILE_NAME.format(digest=catalog.digest)
+    url = f"{settings.MEDIA_URL}{MENU_ARTIFACT_DIR_NAME}/{file_name}"
+
+    # The previous artifact is kept for pages that have already read the old pointer
+    kept_file_names = {file_name}
+    if pointer_path.exists():
+        kept_file_names.add(
+            os.path.basename(json.loads(pointer_path.read_text())["url"])
+        )
+
+    _write_file_atomically(directory / file_name, json.dumps(catalog.as_dict()))
+    _write_file_atomically(
+        pointer_path, json.dumps({"url": url, "digest": catalog.digest})
+    )
+
+    for path in directory.glob(MENU_ARTIFACT_FILE_PATTERN):
+        if path.name not in kept_file_names:
+            path.unlink(missing_ok=True)
+
+    return url
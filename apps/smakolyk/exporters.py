@@ -0,0 +1,170 @@
+import csv
+import io
+import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from itertools import islice
+from typing import BinaryIO
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .reports import write_xlsx
+from .values import EXPORT_FILE_NAME, XLSX_MIMETYPE, TaskSettingValues
+
+# (name, columns, rows) of one exported table
+Table = tuple[str, tuple[str, ...], Iterable[tuple]]
+
+
+@dataclass(frozen=True)
+class OrderExporter:
+    """
+    A file format orders can be exported to. `write` takes a binary file and
+    the tables to write, formats without `multiple_tables` get one table per file
+    """
+
+    name: str
+    extension: str
+    mimetype: str
+    write: Callable[..., None]
+    multiple_tables: bool = False
+
+
+ORDER_EXPORTERS: dict[str, OrderExporter] = dict()
+
+
+def register_order_exporter(
+    name: str, mimetype: str, multiple_tables: bool = False
+) -> Callable:
+    """
+    Registers the decorated writer as the exporter of `name` format
+    :param name: str
+    :param mimetype: str
+    :param multiple_tables: bool
+    :return: Callable
+    """
+
+    def decorator(write: Callable[..., None]) -> Callable[..., None]:
+        ORDER_EXPORTERS[name] = OrderExporter(
+            name=name,
+            extension=name,
+            mimetype=mimetype,
+            write=write,
+            multiple_tables=multiple_tables,
+        )
+
+        return write
+
+    return decorator
+
+
+def get_order_exporter(name: str) -> OrderExporter:
+    """
+    Returns the exporter of `name` format
+    :param name: str
+    :return: OrderExporter
+    """
+    try:
+        return ORDER_EXPORTERS[name]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Unknown orders export format {name!r}, "
+            f"choose one of {', '.join(ORDER_EXPORTERS)}"
+        )
+
+
+def iterate_export_files(
+    exporter: OrderExporter, tables: list[Table]
+) -> Iterator[tuple[str, BinaryIO]]:
+    """
+    Writes tables with the exporter and yields (file name, file) pairs. Every
+    file is a private temporary file, which is removed once the next one is
+    requested, so concurrent exports never share a path
+    :param exporter: OrderExporter
+    :param tables: list[Table]
+    :return: Iterator[tuple[str, BinaryIO]]
+    """
+    files_tables = (
+        [tables] if exporter.multiple_tables else [[table] for table in tables]
+    )
+
+    for file_tables in files_tables:
+        file_name = EXPORT_FILE_NAME.format(
+            name=file_tables[0][0].lower(), extension=exporter.extension
+        )
+
+        with tempfile.TemporaryFile() as file:
+            exporter.write(file, *file_tables)
+            file.seek(0)
+
+            yield file_name, file
+
+
+@register_order_exporter("xlsx", XLSX_MIMETYPE, multiple_tables=True)
+def write_xlsx_tables(file: BinaryIO, *tables: Table) -> None:
+    """
+    Writes every table to its own sheet of a write-only workbook
+    :param file: BinaryIO
+    :param tables: Table
+    :return: None
+    """
+    write_xlsx(file, *tables)
+
+
+@register_order_exporter("csv", "text/csv")
+def write_csv_table(file: BinaryIO, table: Table) -> None:
+    """
+    Writes the table to a UTF-8 CSV file row by row
+    :param file: BinaryIO
+    :param table: Table
+    :return: None
+    """
+    _, columns, rows = table
+    text_file = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    writer = csv.writer(text_file)
+    writer.writerow(columns)
+    writer.writerows(rows)
+    # The caller owns `file`, so it's left open
+    text_file.flush()
+    text_file.detach()
+
+
+@register_order_exporter("parquet", "application/vnd.apache.parquet")
+def write_parquet_table(file: BinaryIO, table: Table) -> None:
+    """
+    Writes the table to a Parquet file in row groups of `EXPORT_CHUNK_SIZE` rows.
+    Requires the optional `pyarrow` dependency
+    :param file: BinaryIO
+    :param table: Table
+    :return: None
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImproperlyConfigured(
+            "Parquet export requires pyarrow, install the `parquet` extra"
+        )
+
+    _, columns, rows = table
+    rows = iter(rows)
+    writer = None
+
+    while chunk := list(islice(rows, TaskSettingValues.EXPORT_CHUNK_SIZE)):
+        # Column types are inferred from the first chunk and kept for the rest
+        arrays = [
+            pa.array(values, type=writer.schema.field(index).type if writer else None)
+            for index, values in enumerate(zip(*chunk))
+        ]
+        record_batch = pa.RecordBatch.from_arrays(arrays, names=list(columns))
+
+        if writer is None:
+            writer = pq.ParquetWriter(file, record_batch.schema)
+
+        writer.write_batch(record_batch)
+
+    if writer is None:
+        writer = pq.ParquetWriter(
+            file, pa.schema([(column, pa.null()) for column in columns])
+        )
+
+    writer.close()
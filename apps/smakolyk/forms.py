@@ -2,9 +2,23 @@ from django import forms
 from django.db import transaction
 from django.utils import timezone
 
+from .catalog import MenuCatalog, get_menu_catalog
 from .models import History, Order
+from .storage import (
+    build_weekly_order,
+    get_week_start,
+    invalidate_week_history,
+    is_weekly_order_storage,
+    record_dish_daily_totals,
+    record_weekly_spend,
+)
 from .utils import get_menu_choices, get_order_data, get_order_total
-from .values import FormDefaultValues, ViewSettingValues
+from .values import (
+    DataMappingValues,
+    FormDefaultValues,
+    ValidationMessages,
+    ViewSettingValues,
+)
 
 
 class DisabledOptionWidget(forms.Select):
@@ -34,26 +48,32 @@ class OrderForm(forms.ModelForm):
         model = Order
         fields = ViewSettingValues.ORDER_FORM_FIELDS
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, menu_choices: dict[str, tuple] = None, **kwargs):
         super(OrderForm, self).__init__(*args, **kwargs)
 
         self.user = self.initial.get("user", None)
 
         # I'm altering choices dynamically, so there won't be any error on running `makemigrations` command
-        self.fields["first_course"].choices = get_menu_choices("first_course")
-        self.fields["second_course"].choices = get_menu_choices("second_course")
-        self.fields["dessert"].choices = get_menu_choices("dessert")
-        self.fields["drink"].choices = get_menu_choices("drink")
+        # A formset passes `menu_choices` computed once for all of its forms
+        for field_name in DataMappingValues.dish_field_names:
+            self.fields[field_name].choices = (
+                menu_choices[field_name]
+                if menu_choices
+                else get_menu_choices(field_name)
+            )
 
     def save(self, commit=True):
         with transaction.atomic():
             order = self.create_order_object()
             order.save()
 
-            order_data = get_order_data(order)
+            catalog = get_menu_catalog()
+            order_data = get_order_data(order, catalog=catalog)
             total_amount = get_order_total(order_data)
 
-            self.create_history_object(order, total_amount, order_data)
+            self.get_history_object(order, total_amount, catalog).save()
+            record_weekly_spend(order.user_id, [order.date], [total_amount])
+            record_dish_daily_totals([order])
 
             return order, order_data, total_amount
 
@@ -84,30 +104,78 @@ class OrderForm(forms.ModelForm):
         )
 
     @staticmethod
-    def create_history_object(
-        order: Order, total_amount: int, order_data: dict
-    ) -> None:
+    def get_history_object(
+        order: Order, total_amount: int, catalog: MenuCatalog
+    ) -> History:
         """
-        A method that creates a History object.
+        A method that creates an unsaved History object.
         :param order: Order object
         :param total_amount: int
-        :param order_data: dict
-        :return: None
+        :param catalog: MenuCatalog
+        :return: History object
         """
-        History.objects.create(
+        return History(
             user=order.user,
             date=order.date,
             total_amount=total_amount,
-            first_course=order.first_course,
+            first_course_dish_id=catalog.get_dish_id(
+                "first_course", order.first_course
+            ),
             first_course_quantity=order.first_course_quantity,
-            first_course_price=order_data.get("first_course_price"),
-            second_course=order.second_course,
+            second_course_dish_id=catalog.get_dish_id(
+                "second_course", order.second_course
+            ),
             second_course_quantity=order.second_course_quantity,
-            second_course_price=order_data.get("second_course_price"),
-            dessert=order.dessert,
+            dessert_dish_id=catalog.get_dish_id("dessert", order.dessert),
             dessert_quantity=order.dessert_quantity,
-            dessert_price=order_data.get("dessert_price"),
-            drink=order.drink,
+            drink_dish_id=catalog.get_dish_id("drink", order.drink),
             drink_quantity=order.drink_quantity,
-            drink_price=order_data.get("drink_price"),
         )
+
+
+class OrderFormSet(forms.BaseFormSet):
+    def clean(self):
+        if any(self.errors) or not is_weekly_order_storage():
+            return
+
+        # A weekly order keeps one entry per weekday of a single week
+        dates = [form.create_order_object().date for form in self.forms]
+
+        if len({date_.weekday() for date_ in dates}) != len(dates):
+            raise forms.ValidationError(ValidationMessages.DUPLICATE_ORDER_DATES)
+
+        if len({get_week_start(date_) for date_ in dates}) > 1:
+            raise forms.ValidationError(ValidationMessages.DIFFERENT_ORDER_WEEKS)
+
+    def save(self) -> list[tuple[Order, dict, int]]:
+        """
+        Saves orders of the whole week, their history and spending in one transaction
+        :return: list[tuple[Order, dict, int]]
+        """
+        catalog = get_menu_catalog()
+        orders = [form.create_order_object() for form in self.forms]
+        orders_data = [get_order_data(order, catalog=catalog) for order in orders]
+        total_amounts = [get_order_total(order_data) for order_data in orders_data]
+
+        with transaction.atomic():
+            if is_weekly_order_storage():
+                build_weekly_order(orders, total_amounts, catalog).save()
+            else:
+                Order.objects.bulk_create(orders)
+                History.objects.bulk_create(
+                    OrderForm.get_history_object(order, total_amount, catalog)
+                    for order, total_amount in zip(orders, total_amounts)
+                )
+                # `bulk_create` doesn't send signals that invalidate cached history
+                transaction.on_commit(
+                    lambda: invalidate_week_history(
+                        orders[0].user_id, [order.date for order in orders]
+                    )
+                )
+
+            record_weekly_spend(
+                orders[0].user_id, [order.date for order in orders], total_amounts
+            )
+            record_dish_daily_totals(orders)
+
+        return list(zip(orders, orders_data, total_amounts))
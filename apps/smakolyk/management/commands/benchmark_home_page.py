@@ -0,0 +1,100 @@
+import time
+import uuid
+from collections.abc import Callable
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from apps.smakolyk.catalog import MenuCatalog
+from apps.smakolyk.values import CacheSettingValues, DataMappingValues
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the home page render time with and without "
+        "the menu carousel fragment cache"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument(
+            "--dishes",
+            type=int,
+            default=30,
+            help="Number of dishes per course in the benchmarked menu",
+        )
+
+    def handle(self, *args, **options):
+        iterations: int = options["iterations"]
+        catalog = self.get_catalog(options["dishes"])
+        fragment_key = make_template_fragment_key(
+            CacheSettingValues.MENU_CAROUSEL_FRAGMENT_NAME, [catalog.digest]
+        )
+        request = RequestFactory().get("/smakolyk/")
+        request.user = AnonymousUser()
+        context = {
+            "menu": catalog.carousel,
+            "menu_digest": catalog.digest,
+            "menu_fragment_timeout": CacheSettingValues.MENU_CAROUSEL_FRAGMENT_TIMEOUT,
+            "has_order": False,
+        }
+
+        def render() -> str:
+            return render_to_string("home.html", context, request)
+
+        without_cache = self.measure(
+            render, iterations, before=lambda: cache.delete(fragment_key)
+        )
+        render()
+        with_cache = self.measure(render, iterations)
+        cache.delete(fragment_key)
+
+        self.stdout.write(f"Iterations: {iterations}")
+        self.stdout.write(f"Without fragment cache: {without_cache:.3f} ms")
+        self.stdout.write(f"With fragment cache: {with_cache:.3f} ms")
+        self.stdout.write(
+            self.style.SUCCESS(f"Speedup: {without_cache / with_cache:.1f}x")
+        )
+
+    @staticmethod
+    def get_catalog(dishes_number: int) -> MenuCatalog:
+        """
+        Returns a synthetic menu catalog, so the benchmark doesn't touch the DB
+        :param dishes_number: int
+        :return: MenuCatalog
+        """
+        return MenuCatalog.from_dishes(
+            "benchmark",
+            [
+                (course_type, f"{course_type} {position}", position + 1, uuid.uuid4())
+                for course_type in DataMappingValues.dish_field_names
+                for position in range(dishes_number)
+            ],
+        )
+
+    @staticmethod
+    def measure(
+        render: Callable[[], str], iterations: int, before: Callable = None
+    ) -> float:
+        """
+        Returns the average render time in milliseconds
+        :param render: Callable[[], str]
+        :param iterations: int
+        :param before: Callable = None
+        :return: float
+        """
+        total = 0.0
+
+        for _ in range(iterations):
+            if before:
+                before()
+
+            start = time.perf_counter()
+            render()
+            total += time.perf_counter() - start
+
+        return total / iterations * 1000
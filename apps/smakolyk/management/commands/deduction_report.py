@@ -0,0 +1,46 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.smakolyk.reports import (
+    get_deduction_report,
+    iterate_deduction_report_csv,
+    iterate_deduction_report_rows,
+    write_deduction_report_xlsx,
+)
+from apps.smakolyk.values import ReportSettingValues
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the monthly payroll deduction report of orders over the daily "
+        "limit, reading history from the DB in chunks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=ReportSettingValues.FORMATS, default="csv"
+        )
+        parser.add_argument("--from", dest="date_from", type=date.fromisoformat)
+        parser.add_argument("--to", dest="date_to", type=date.fromisoformat)
+        parser.add_argument(
+            "--output", help="File to write the report to, CSV defaults to stdout"
+        )
+
+    def handle(self, *args, **options):
+        rows = iterate_deduction_report_rows(
+            get_deduction_report(options["date_from"], options["date_to"])
+        )
+
+        if options["format"] == "xlsx":
+            if not options["output"]:
+                raise CommandError("--output is required for the xlsx format")
+
+            with open(options["output"], "wb") as file:
+                write_deduction_report_xlsx(rows, file)
+        elif options["output"]:
+            with open(options["output"], "w", newline="") as file:
+                file.writelines(iterate_deduction_report_csv(rows))
+        else:
+            for line in iterate_deduction_report_csv(rows):
+                self.stdout.write(line, ending="")
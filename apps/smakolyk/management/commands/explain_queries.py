@@ -0,0 +1,188 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import QuerySet
+
+from apps.smakolyk.catalog import MenuCatalog, save_menu
+from apps.smakolyk.models import History, Order, WeeklySpend
+from apps.smakolyk.storage import get_history_after, get_iso_week, get_user_spend
+from apps.smakolyk.values import DataMappingValues, ViewSettingValues
+from apps.user.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN ANALYZE on the order and history queries of the views "
+        "against a seeded dataset, which is rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=300)
+        parser.add_argument(
+            "--weeks",
+            type=int,
+            default=104,
+            help="Number of weeks of order history per user",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Run with DEBUG off, ANALYZE statistics outlive the rollback",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError(
+                "The command seeds data into the configured DB, "
+                "run it with DEBUG on or pass --force"
+            )
+
+        with transaction.atomic():
+            user = self.seed(options["users"], options["weeks"])
+
+            for label, queryset in self.get_queries(user).items():
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                self.stdout.write(queryset.explain(analyze=True, buffers=True))
+                self.stdout.write("")
+
+            transaction.set_rollback(True)
+
+    def seed(self, users_number: int, weeks_number: int) -> CustomUser:
+        """
+        Creates users with weekly history and next week orders, returns one of them
+        :param users_number: int
+        :param weeks_number: int
+        :return: CustomUser
+        """
+        # The seeded menu is rolled back, so catalogs of other processes are kept
+        version = save_menu(
+            [
+                {
+                    field_name: f"{field_name} {position}"
+                    for field_name in DataMappingValues.dish_field_names
+                }
+                | {
+                    field_name: position + 1
+                    for field_name in DataMappingValues.dish_price_field_names
+                }
+                for position in range(ViewSettingValues.CHUNK_MENU_SIZE)
+            ],
+            invalidate=False,
+        )
+        catalog = MenuCatalog.build(str(version))
+        users = CustomUser.objects.bulk_create(
+            CustomUser(email=f"explain-{number}@example.com", password="!")
+            for number in range(users_number)
+        )
+        next_week_start = self.get_week_start(date.today()) + timedelta(days=7)
+        dish_ids = {
+            f"{field_name}_dish_id": catalog.get_dish_id(
+                field_name, catalog.dishes[field_name][0]
+            )
+            for field_name in DataMappingValues.dish_field_names
+        }
+
+        for user in users:
+            History.objects.bulk_create(
+                History(
+                    user=user,
+                    date=next_week_start - timedelta(weeks=week, days=-day),
+                    total_amount=ViewSettingValues.MAX_ORDER_AMOUNT,
+                    **dish_ids,
+                )
+                for week in range(weeks_number)
+                for day in range(ViewSettingValues.FORMS_NUMBER)
+            )
+            WeeklySpend.objects.bulk_create(
+                WeeklySpend(
+                    user=user,
+                    iso_week=get_iso_week(next_week_start - timedelta(weeks=week)),
+                    total=ViewSettingValues.MAX_ORDER_AMOUNT
+                    * ViewSettingValues.FORMS_NUMBER,
+                    days_ordered=ViewSettingValues.FORMS_NUMBER,
+                )
+                for week in range(weeks_number)
+            )
+            Order.objects.bulk_create(
+                Order(
+                    user=user,
+                    date=next_week_start + timedelta(days=day),
+                    first_course=catalog.dishes["first_course"][0],
+                    first_course_quantity=1,
+                )
+                for day in range(ViewSettingValues.FORMS_NUMBER)
+            )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ANALYZE {History._meta.db_table}, {Order._meta.db_table}, "
+                f"{WeeklySpend._meta.db_table}"
+            )
+
+        return users[len(users) // 2]
+
+    def get_queries(self, user: CustomUser) -> dict[str, QuerySet]:
+        """
+        Returns the queries run by the views, `exists()` checks are explained
+        through the equivalent `LIMIT 1` query on the filtered columns
+        :param user: CustomUser
+        :return: dict[str, QuerySet]
+        """
+        this_week_start = self.get_week_start(date.today())
+        next_week_start = this_week_start + timedelta(days=7)
+        next_week_end = next_week_start + timedelta(
+            days=ViewSettingValues.FORMS_NUMBER - 1
+        )
+
+        # The last row of the page before a year old one is its cursor, histories
+        # shorter than a year are paged from their oldest row
+        history = History.objects.filter(user_id=user.id).order_by("-date", "-id")
+        cursor_row = (
+            history.filter(date__lt=this_week_start - timedelta(weeks=52)).first()
+            or history.last()
+        )
+        page_size = ViewSettingValues.HISTORY_API_PAGE_SIZE + 1
+
+        return {
+            "HomePageView: user has ordered, on a cache miss": get_user_spend(user.id)
+            .order_by()
+            .values("user_id")[:1],
+            "HistorySetterAjaxView: user history for the week, on a cache miss": (
+                History.objects.for_display().filter(
+                    user_id=user.id,
+                    date__in=[
+                        this_week_start + timedelta(days=day)
+                        for day in range(ViewSettingValues.FORMS_NUMBER)
+                    ],
+                )
+            ),
+            "HistoryView: user history for two weeks": (
+                History.objects.for_display().filter(
+                    user_id=user.id,
+                    date__in=[
+                        this_week_start + timedelta(days=day)
+                        for day in range(14)
+                        if day % 7 < ViewSettingValues.FORMS_NUMBER
+                    ],
+                )
+            ),
+            "HistoryApiView: a year old page of user history": get_history_after(
+                user.id, cursor_row.date, cursor_row.id
+            )[:page_size],
+            "OrderView: next week is ordered": Order.objects.filter(
+                user_id=user.id, date__range=(next_week_start, next_week_end)
+            )
+            .order_by()
+            .values("user_id")[:1],
+        }
+
+    @staticmethod
+    def get_week_start(date_: date) -> date:
+        """
+        Returns Monday of the week `date_` belongs to
+        :param date_: date
+        :return: date
+        """
+        return date_ - timedelta(days=date_.weekday())
@@ -0,0 +1,55 @@
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.smakolyk.exporters import (
+    ORDER_EXPORTERS,
+    get_order_exporter,
+    iterate_export_files,
+)
+from apps.smakolyk.storage import lock_pending_orders, remove_exported_orders
+from apps.smakolyk.tasks import get_export_tables
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes current orders and their dish summary to files in the chosen "
+        "format, without sending them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=sorted(ORDER_EXPORTERS),
+            default=settings.ORDERS_EXPORT_FORMAT,
+        )
+        parser.add_argument("--output-dir", type=Path, default=Path.cwd())
+        parser.add_argument(
+            "--remove",
+            action="store_true",
+            help="Remove exported orders like the scheduled export does",
+        )
+
+    def handle(self, *args, **options):
+        output_dir: Path = options["output_dir"]
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        # Orders are removed in the transaction they're read in, after all files
+        # have been written, and can't be saved in between
+        with transaction.atomic():
+            if options["remove"]:
+                lock_pending_orders()
+
+            for file_name, file in iterate_export_files(
+                get_order_exporter(options["format"]), get_export_tables()
+            ):
+                with open(output_dir / file_name, "wb") as output_file:
+                    shutil.copyfileobj(file, output_file)
+
+                self.stdout.write(str(output_dir / file_name))
+
+            if options["remove"]:
+                remove_exported_orders()
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.smakolyk.storage import create_upcoming_order_partitions
+from apps.smakolyk.values import TaskSettingValues
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates weekly partitions of orders for the coming weeks and moves "
+        "orders kept in the default partition to partitions of their weeks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--weeks-ahead",
+            type=int,
+            default=TaskSettingValues.ORDER_PARTITION_WEEKS_AHEAD,
+            help="Number of weeks after the current one to create partitions for",
+        )
+
+    def handle(self, *args, **options):
+        for partition in create_upcoming_order_partitions(options["weeks_ahead"]):
+            self.stdout.write(partition)
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.6 on 2026-10-18 07:22
+
+import uuid
+
+from django.db import migrations, models
+
+COURSE_TYPES = ("first_course", "second_course", "dessert", "drink")
+
+
+def copy_menu_to_dishes(apps, schema_editor):
+    Menu = apps.get_model("smakolyk", "Menu")
+    Dish = apps.get_model("smakolyk", "Dish")
+
+    # Ids are derived like the ones of `fixtures/first_menu.json`, so loading the
+    # fixture again updates the copied dishes instead of duplicating them
+    Dish.objects.bulk_create(
+        Dish(
+            id=uuid.uuid5(menu.id, course_type),
+            course_type=course_type,
+            name=getattr(menu, course_type),
+            price=getattr(menu, f"{course_type}_price"),
+            position=position,
+            menu_version=1,
+        )
+        for position, menu in enumerate(Menu.objects.order_by("created_at"))
+        for course_type in COURSE_TYPES
+    )
+
+
+def copy_dishes_to_menu(apps, schema_editor):
+    Menu = apps.get_model("smakolyk", "Menu")
+    Dish = apps.get_model("smakolyk", "Dish")
+
+    latest = Dish.objects.order_by("-menu_version").values("menu_version")[:1]
+    rows: dict[int, dict] = dict()
+
+    for dish in Dish.objects.filter(menu_version=models.Subquery(latest)):
+        rows.setdefault(dish.position, dict()).update(
+            {dish.course_type: dish.name, f"{dish.course_type}_price": dish.price}
+        )
+
+    Menu.objects.bulk_create(Menu(**row) for _, row in sorted(rows.items()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("smakolyk", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Dish",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "course_type",
+                    models.CharField(
+                        choices=[
+                            ("first_course", "First course"),
+                            ("second_course", "Second course"),
+                            ("dessert", "Dessert"),
+                            ("drink", "Drink"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("price", models.PositiveIntegerField()),
+                ("position", models.PositiveIntegerField()),
+                ("menu_version", models.PositiveIntegerField()),
+            ],
+            options={
+                "verbose_name_plural": "dishes",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="dish",
+            index=models.Index(
+                fields=["menu_version", "course_type", "position"],
+                name="dish_menu_listing_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="dish",
+            constraint=models.UniqueConstraint(
+                fields=("menu_version", "course_type", "name"),
+                name="unique_dish_in_menu_version",
+            ),
+        ),
+        migrations.RunPython(copy_menu_to_dishes, copy_dishes_to_menu),
+        migrations.DeleteModel(
+            name="Menu",
+        ),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 4.2.6 on 2026-10-18 07:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("smakolyk", "0002_dish"),
+    ]
+
+    operations = [
+        # Copied dishes stay nullable until they're removed, so 0004 can be reversed
+        migrations.AlterField(
+            model_name="history",
+            name="first_course",
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name="history",
+            name="second_course",
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name="history",
+            name="dessert",
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name="history",
+            name="drink",
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name="history",
+            name="first_course_price",
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="history",
+            name="second_course_price",
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="history",
+            name="dessert_price",
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="history",
+            name="drink_price",
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.RemoveConstraint(
+            model_name="dish",
+            name="unique_dish_in_menu_version",
+        ),
+        migrations.AddConstraint(
+            model_name="dish",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("menu_version", 0), _negated=True),
+                fields=("menu_version", "course_type", "name"),
+                name="unique_dish_in_menu_version",
+            ),
+        ),
+        migrations.AddField(
+            model_name="history",
+            name="first_course_dish",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="smakolyk.dish",
+            ),
+        ),
+        migrations.AddField(
+            model_name="history",
+            name="second_course_dish",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="smakolyk.dish",
+            ),
+        ),
+        migrations.AddField(
+            model_name="history",
+            name="dessert_dish",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="smakolyk.dish",
+            ),
+        ),
+        migrations.AddField(
+            model_name="history",
+            name="drink_dish",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="smakolyk.dish",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="history",
+            name="first_course_quantity",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="history",
+            name="second_course_quantity",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="history",
+            name="dessert_quantity",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="history",
+            name="drink_quantity",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,125 @@
+# Generated by Django 4.2.6 on 2026-10-18 07:25
+
+from django.db import migrations, transaction
+
+COURSE_TYPES = ("first_course", "second_course", "dessert", "drink")
+DISH_NOT_CHOSEN_VALUE = "Not chosen"
+DISH_PRICE_NOT_CHOSEN_VALUE = 0
+LEGACY_MENU_VERSION = 0
+BATCH_SIZE = 1000
+
+
+def iterate_history_batches(History, queryset=None):
+    """
+    Yields History rows in batches ordered by primary key
+    """
+    queryset = queryset if queryset is not None else History.objects.all()
+    last_id = None
+
+    while True:
+        batch = queryset.order_by("id")
+        if last_id is not None:
+            batch = batch.filter(id__gt=last_id)
+
+        if not (batch := list(batch[:BATCH_SIZE])):
+            return
+
+        yield batch
+        last_id = batch[-1].id
+
+
+def link_history_to_dishes(apps, schema_editor):
+    Dish = apps.get_model("smakolyk", "Dish")
+    History = apps.get_model("smakolyk", "History")
+
+    # A dish with the same name and price is reused from the latest menu version
+    # it appears in, the rest are archived in the legacy menu version
+    dish_ids = {
+        (course_type, name, price): dish_id
+        for dish_id, course_type, name, price in Dish.objects.order_by(
+            "menu_version"
+        ).values_list("id", "course_type", "name", "price")
+    }
+
+    for batch in iterate_history_batches(History):
+        legacy_dishes = list()
+
+        for history in batch:
+            for course_type in COURSE_TYPES:
+                key = (
+                    course_type,
+                    getattr(history, course_type),
+                    getattr(history, f"{course_type}_price"),
+                )
+
+                if key[1] != DISH_NOT_CHOSEN_VALUE and key not in dish_ids:
+                    dish = Dish(
+                        course_type=course_type,
+                        name=key[1],
+                        price=key[2],
+                        position=len(dish_ids),
+                        menu_version=LEGACY_MENU_VERSION,
+                    )
+                    dish_ids[key] = dish.id
+                    legacy_dishes.append(dish)
+
+                setattr(history, f"{course_type}_dish_id", dish_ids.get(key))
+
+        with transaction.atomic():
+            Dish.objects.bulk_create(legacy_dishes)
+            History.objects.bulk_update(
+                batch, [f"{course_type}_dish" for course_type in COURSE_TYPES]
+            )
+
+
+def copy_dishes_to_history(apps, schema_editor):
+    Dish = apps.get_model("smakolyk", "Dish")
+    History = apps.get_model("smakolyk", "History")
+
+    queryset = History.objects.select_related(
+        *[f"{course_type}_dish" for course_type in COURSE_TYPES]
+    )
+
+    for batch in iterate_history_batches(History, queryset):
+        for history in batch:
+            for course_type in COURSE_TYPES:
+                dish = getattr(history, f"{course_type}_dish")
+
+                setattr(
+                    history, course_type, dish.name if dish else DISH_NOT_CHOSEN_VALUE
+                )
+                setattr(
+                    history,
+                    f"{course_type}_price",
+                    dish.price if dish else DISH_PRICE_NOT_CHOSEN_VALUE,
+                )
+
+        with transaction.atomic():
+            History.objects.bulk_update(
+                batch,
+                [
+                    field_name
+                    for course_type in COURSE_TYPES
+                    for field_name in (course_type, f"{course_type}_price")
+                ],
+            )
+
+    # Legacy dishes would break the unconditional unique constraint
+    with transaction.atomic():
+        History.objects.update(
+            **{f"{course_type}_dish": None for course_type in COURSE_TYPES}
+        )
+        Dish.objects.filter(menu_version=LEGACY_MENU_VERSION).delete()
+
+
+class Migration(migrations.Migration):
+    # Every batch is committed on its own, see `link_history_to_dishes`
+    atomic = False
+
+    dependencies = [
+        ("smakolyk", "0003_history_dish_references"),
+    ]
+
+    operations = [
+        migrations.RunPython(link_history_to_dishes, copy_dishes_to_history),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.6 on 2026-10-18 07:25
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("smakolyk", "0004_link_history_to_dishes"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="history",
+            name="first_course",
+        ),
+        migrations.RemoveField(
+            model_name="history",
+            name="first_course_price",
+        ),
+        migrations.RemoveField(
+            model_name="history",
+            name="second_course",
+        ),
+        migrations.RemoveField(
+            model_name="history",
+            name="second_course_price",
+        ),
+        migrations.RemoveField(
+            model_name="history",
+            name="dessert",
+        ),
+        migrations.RemoveField(
+            model_name="history",
+            name="dessert_price",
+        ),
+        migrations.RemoveField(
+            model_name="history",
+            name="drink",
+        ),
+        migrations.RemoveField(
+            model_name="history",
+            name="drink_price",
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.6 on 2026-10-18 07:31
+
+from django.db import migrations, models
+
+
+def delete_duplicate_orders(apps, schema_editor):
+    Order = apps.get_model("smakolyk", "Order")
+
+    # The first order of a user for a day is kept, later ones are resubmissions
+    first_orders = (
+        Order.objects.filter(
+            user_id=models.OuterRef("user_id"), date=models.OuterRef("date")
+        )
+        .order_by("created_at", "id")
+        .values("id")[:1]
+    )
+    Order.objects.exclude(id=models.Subquery(first_orders)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("smakolyk", "0005_remove_history_dish_copies"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_orders, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="order",
+            constraint=models.UniqueConstraint(
+                fields=("user", "date"), name="unique_order_per_user_day"
+            ),
+        ),
+    ]
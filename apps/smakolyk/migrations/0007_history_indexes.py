@@ -0,0 +1,48 @@
+# Generated by Django 4.2.6 on 2026-10-18 07:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("smakolyk", "0006_unique_order_per_user_day"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="history",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="history",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="order",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="order",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="history",
+            index=models.Index(
+                fields=["user", "-date"],
+                include=("total_amount",),
+                name="history_user_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="history",
+            index=models.Index(fields=["date"], name="history_date_idx"),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.6 on 2026-10-18 07:37
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("smakolyk", "0007_history_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WeeklyOrder",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("week_start", models.DateField()),
+                ("days", models.JSONField()),
+                ("exported_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="weekly_orders",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-week_start"],
+                "indexes": [
+                    models.Index(fields=["week_start"], name="weekly_order_week_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="weeklyorder",
+            constraint=models.UniqueConstraint(
+                fields=("user", "week_start"), name="unique_weekly_order_per_user"
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.6 on 2026-10-18 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("smakolyk", "0008_weeklyorder"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="history",
+            name="history_user_date_idx",
+        ),
+        migrations.AddIndex(
+            model_name="history",
+            index=models.Index(
+                fields=["user", "-date", "-id"],
+                include=("total_amount",),
+                name="history_user_date_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 4.2.6 on 2026-10-18 07:44
+
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+ISO_WEEK_FORMAT = "%G-W%V"
+MAX_ORDER_AMOUNT = 200
+
+
+def backfill_weekly_spend(apps, schema_editor):
+    History = apps.get_model("smakolyk", "History")
+    WeeklyOrder = apps.get_model("smakolyk", "WeeklyOrder")
+    WeeklySpend = apps.get_model("smakolyk", "WeeklySpend")
+    weeks = defaultdict(lambda: [0, 0, 0])
+
+    history_days = History.objects.values_list(
+        "user_id", "date", "total_amount"
+    ).iterator()
+    weekly_order_days = (
+        (user_id, week_start + timedelta(days=int(weekday)), day["total_amount"])
+        for user_id, week_start, payload in WeeklyOrder.objects.values_list(
+            "user_id", "week_start", "days"
+        ).iterator()
+        for weekday, day in payload.items()
+    )
+
+    for days in (history_days, weekly_order_days):
+        for user_id, date_, total_amount in days:
+            week = weeks[(user_id, date_.strftime(ISO_WEEK_FORMAT))]
+            week[0] += total_amount
+            week[1] += max(total_amount - MAX_ORDER_AMOUNT, 0)
+            week[2] += 1
+
+    WeeklySpend.objects.bulk_create(
+        (
+            WeeklySpend(
+                user_id=user_id,
+                iso_week=iso_week,
+                total=total,
+                oversum=oversum,
+                days_ordered=days_ordered,
+            )
+            for (user_id, iso_week), (total, oversum, days_ordered) in weeks.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("smakolyk", "0009_history_keyset_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WeeklySpend",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("iso_week", models.CharField(max_length=8)),
+                ("total", models.PositiveIntegerField(default=0)),
+                ("oversum", models.PositiveIntegerField(default=0)),
+                ("days_ordered", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="weekly_spends",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-iso_week"],
+                "indexes": [
+                    models.Index(fields=["iso_week"], name="weekly_spend_week_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="weeklyspend",
+            constraint=models.UniqueConstraint(
+                fields=("user", "iso_week"), name="unique_weekly_spend_per_user"
+            ),
+        ),
+        migrations.RunPython(backfill_weekly_spend, migrations.RunPython.noop),
+    ]
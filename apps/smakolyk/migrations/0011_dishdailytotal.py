@@ -0,0 +1,108 @@
+# Generated by Django 4.2.6 on 2026-10-18 07:57
+
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import migrations, models
+
+COURSE_TYPES = ("first_course", "second_course", "dessert", "drink")
+
+
+def backfill_dish_daily_totals(apps, schema_editor):
+    Dish = apps.get_model("smakolyk", "Dish")
+    DishDailyTotal = apps.get_model("smakolyk", "DishDailyTotal")
+    Order = apps.get_model("smakolyk", "Order")
+    WeeklyOrder = apps.get_model("smakolyk", "WeeklyOrder")
+    totals = defaultdict(int)
+
+    for course_type in COURSE_TYPES:
+        for date_, dish, quantity in (
+            Order.objects.values("date", dish=models.F(course_type))
+            .annotate(quantity=models.Sum(f"{course_type}_quantity"))
+            .filter(quantity__gt=0)
+            .values_list("date", "dish", "quantity")
+        ):
+            totals[(date_, course_type, dish)] += quantity
+
+    weekly_orders = list(WeeklyOrder.objects.filter(exported_at__isnull=True))
+    dishes = Dish.objects.in_bulk(
+        {
+            dish_id
+            for weekly_order in weekly_orders
+            for day in weekly_order.days.values()
+            for dish_id in day["dishes"]
+            if dish_id
+        }
+    )
+
+    for weekly_order in weekly_orders:
+        for weekday, day in weekly_order.days.items():
+            for course_type, dish_id, quantity in zip(
+                COURSE_TYPES, day["dishes"], day["quantities"]
+            ):
+                if dish_id and quantity:
+                    date_ = weekly_order.week_start + timedelta(days=int(weekday))
+                    dish = dishes[uuid.UUID(dish_id)].name
+                    totals[(date_, course_type, dish)] += quantity
+
+    DishDailyTotal.objects.bulk_create(
+        (
+            DishDailyTotal(
+                date=date_, course_type=course_type, dish=dish, quantity=quantity
+            )
+            for (date_, course_type, dish), quantity in totals.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("smakolyk", "0010_weeklyspend"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DishDailyTotal",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("date", models.DateField()),
+                (
+                    "course_type",
+                    models.CharField(
+                        choices=[
+                            ("first_course", "First course"),
+                            ("second_course", "Second course"),
+                            ("dessert", "Dessert"),
+                            ("drink", "Drink"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("dish", models.CharField(max_length=100)),
+                ("quantity", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["date", "course_type", "dish"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dishdailytotal",
+            constraint=models.UniqueConstraint(
+                fields=("date", "course_type", "dish"), name="unique_dish_daily_total"
+            ),
+        ),
+        migrations.RunPython(backfill_dish_daily_totals, migrations.RunPython.noop),
+    ]
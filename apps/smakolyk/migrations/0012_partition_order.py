@@ -0,0 +1,51 @@
+from django.db import migrations
+
+# Orders are moved to a table partitioned by weeks of `date`, the primary key
+# and the unique constraint have to include the partition key. Rows of weeks
+# without a partition are kept in the default one until the `order_partitions`
+# command moves them to their weekly partitions
+PARTITION_ORDER_SQL = """
+ALTER TABLE smakolyk_order RENAME TO smakolyk_order_unpartitioned;
+CREATE TABLE smakolyk_order (
+    LIKE smakolyk_order_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+) PARTITION BY RANGE (date);
+CREATE TABLE smakolyk_order_default PARTITION OF smakolyk_order DEFAULT;
+INSERT INTO smakolyk_order SELECT * FROM smakolyk_order_unpartitioned;
+DROP TABLE smakolyk_order_unpartitioned;
+ALTER TABLE smakolyk_order
+    ADD CONSTRAINT smakolyk_order_pkey PRIMARY KEY (id, date),
+    ADD CONSTRAINT unique_order_per_user_day UNIQUE (user_id, date),
+    ADD CONSTRAINT smakolyk_order_user_id_b753958f_fk_user_customuser_id
+        FOREIGN KEY (user_id) REFERENCES user_customuser (id)
+        DEFERRABLE INITIALLY DEFERRED;
+"""
+
+UNPARTITION_ORDER_SQL = """
+ALTER TABLE smakolyk_order RENAME TO smakolyk_order_partitioned;
+ALTER TABLE smakolyk_order_partitioned
+    DROP CONSTRAINT smakolyk_order_pkey,
+    DROP CONSTRAINT unique_order_per_user_day,
+    DROP CONSTRAINT smakolyk_order_user_id_b753958f_fk_user_customuser_id;
+CREATE TABLE smakolyk_order (
+    LIKE smakolyk_order_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+);
+INSERT INTO smakolyk_order SELECT * FROM smakolyk_order_partitioned;
+DROP TABLE smakolyk_order_partitioned;
+ALTER TABLE smakolyk_order
+    ADD CONSTRAINT smakolyk_order_pkey PRIMARY KEY (id),
+    ADD CONSTRAINT unique_order_per_user_day UNIQUE (user_id, date),
+    ADD CONSTRAINT smakolyk_order_user_id_b753958f_fk_user_customuser_id
+        FOREIGN KEY (user_id) REFERENCES user_customuser (id)
+        DEFERRABLE INITIALLY DEFERRED;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("smakolyk", "0011_dishdailytotal"),
+    ]
+
+    operations = [
+        migrations.RunSQL(PARTITION_ORDER_SQL, UNPARTITION_ORDER_SQL),
+    ]
@@ -3,11 +3,19 @@ from django.db import models
 from apps.shared.models import AbstractModel
 from apps.user.models import CustomUser
 
-from .values import ValidationValues
+from .values import (
+    LEGACY_MENU_VERSION,
+    DataMappingValues,
+    FormDefaultValues,
+    ValidationValues,
+)
 
 
 class Order(AbstractModel):
-    user = models.ForeignKey(CustomUser, related_name="order", on_delete=models.CASCADE)
+    # Lookups by user are served by the (user, date) unique constraint
+    user = models.ForeignKey(
+        CustomUser, related_name="order", on_delete=models.CASCADE, db_index=False
+    )
     date = models.DateField()
     first_course = models.CharField(
         max_length=ValidationValues.first_course_max_length_value
@@ -32,75 +40,307 @@ class Order(AbstractModel):
 
     class Meta:
         app_label = "smakolyk"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "date"], name="unique_order_per_user_day"
+            )
+        ]
 
     def __str__(self):
         return f"{self.user.userprofile}'s order on {self.date}"
 
 
-class Menu(AbstractModel):
-    first_course = models.CharField(
-        max_length=ValidationValues.first_course_max_length_value, unique=True
-    )
-    first_course_price = models.PositiveIntegerField()
-    second_course = models.CharField(
-        max_length=ValidationValues.second_course_max_length_value, unique=True
-    )
-    second_course_price = models.PositiveIntegerField()
-    dessert = models.CharField(
-        max_length=ValidationValues.dessert_max_length_value, unique=True
-    )
-    dessert_price = models.PositiveIntegerField()
-    drink = models.CharField(
-        max_length=ValidationValues.drink_max_length_value, unique=True
+class CourseType(models.TextChoices):
+    FIRST_COURSE = "first_course", "First course"
+    SECOND_COURSE = "second_course", "Second course"
+    DESSERT = "dessert", "Dessert"
+    DRINK = "drink", "Drink"
+
+
+class DishQuerySet(models.QuerySet):
+    def current(self) -> "DishQuerySet":
+        """
+        Returns dishes of the latest uploaded menu version
+        :return: DishQuerySet
+        """
+        return self.filter(
+            menu_version=models.Subquery(
+                Dish.objects.exclude(menu_version=LEGACY_MENU_VERSION)
+                .order_by("-menu_version")
+                .values("menu_version")[:1]
+            )
+        )
+
+
+class Dish(AbstractModel):
+    course_type = models.CharField(
+        max_length=ValidationValues.course_type_max_length_value,
+        choices=CourseType.choices,
     )
-    drink_price = models.PositiveIntegerField()
+    name = models.CharField(max_length=ValidationValues.dish_name_max_length_value)
+    price = models.PositiveIntegerField()
+    # Row number of the dish in the uploaded menu file
+    position = models.PositiveIntegerField()
+    # `LEGACY_MENU_VERSION` holds dishes ordered before menus were versioned
+    menu_version = models.PositiveIntegerField()
+
+    objects = DishQuerySet.as_manager()
+
+    class Meta:
+        verbose_name_plural = "dishes"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["menu_version", "course_type", "name"],
+                condition=~models.Q(menu_version=LEGACY_MENU_VERSION),
+                name="unique_dish_in_menu_version",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["menu_version", "course_type", "position"],
+                name="dish_menu_listing_idx",
+            )
+        ]
 
     def __str__(self):
-        return (
-            f"Menu({self.first_course}, "
-            f"{self.first_course_price}, "
-            f"{self.second_course}, "
-            f"{self.second_course_price}, "
-            f"{self.dessert}, "
-            f"{self.dessert_price}, "
-            f"{self.drink}, "
-            f"{self.drink_price})"
+        return f"{self.name} ({self.course_type}, {self.price})"
+
+
+class HistoryQuerySet(models.QuerySet):
+    def with_dishes(self) -> "HistoryQuerySet":
+        """
+        Joins ordered dishes, so reading their names and prices doesn't hit the DB
+        :return: HistoryQuerySet
+        """
+        return self.select_related(*DataMappingValues.history_dish_field_names)
+
+    def for_display(self) -> "HistoryQuerySet":
+        """
+        Joins ordered dishes and reads only the fields shown to users
+        :return: HistoryQuerySet
+        """
+        return self.with_dishes().only(
+            "date",
+            "total_amount",
+            *DataMappingValues.dish_quantity_field_names,
+            *[
+                f"{field_name}__{dish_field_name}"
+                for field_name in DataMappingValues.history_dish_field_names
+                for dish_field_name in ("name", "price")
+            ],
         )
 
 
 class History(AbstractModel):
+    # Lookups by user are served by `history_user_date_idx`
     user = models.ForeignKey(
-        CustomUser, related_name="history", on_delete=models.CASCADE
+        CustomUser, related_name="history", on_delete=models.CASCADE, db_index=False
     )
     date = models.DateField()
     total_amount = models.PositiveIntegerField()
-    first_course = models.CharField(
-        max_length=ValidationValues.first_course_max_length_value
+    # Dishes are immutable, so a reference keeps the name and the price of the order day.
+    # Nothing looks history up by dish, so the references aren't indexed
+    first_course_dish = models.ForeignKey(
+        Dish,
+        related_name="+",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_index=False,
     )
-    first_course_quantity = models.PositiveIntegerField(
+    first_course_quantity = models.PositiveSmallIntegerField(
         default=ValidationValues.first_course_quantity_default_value
     )
-    first_course_price = models.PositiveIntegerField()
-    second_course = models.CharField(
-        max_length=ValidationValues.second_course_max_length_value
+    second_course_dish = models.ForeignKey(
+        Dish,
+        related_name="+",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_index=False,
     )
-    second_course_quantity = models.PositiveIntegerField(
+    second_course_quantity = models.PositiveSmallIntegerField(
         default=ValidationValues.second_course_quantity_default_value
     )
-    second_course_price = models.PositiveIntegerField()
-    dessert = models.CharField(max_length=ValidationValues.dessert_max_length_value)
-    dessert_quantity = models.PositiveIntegerField(
+    dessert_dish = models.ForeignKey(
+        Dish,
+        related_name="+",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    dessert_quantity = models.PositiveSmallIntegerField(
         default=ValidationValues.dessert_quantity_default_value
     )
-    dessert_price = models.PositiveIntegerField()
-    drink = models.CharField(max_length=ValidationValues.drink_max_length_value)
-    drink_quantity = models.PositiveIntegerField(
+    drink_dish = models.ForeignKey(
+        Dish,
+        related_name="+",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    drink_quantity = models.PositiveSmallIntegerField(
         default=ValidationValues.drink_quantity_default_value
     )
-    drink_price = models.PositiveIntegerField()
+
+    objects = HistoryQuerySet.as_manager()
 
     class Meta:
         ordering = ["-date"]
+        indexes = [
+            # Matches the default ordering, so per-user queries aren't sorted, and
+            # lets history pages be sought by (date, id) of the previous page
+            models.Index(
+                fields=["user", "-date", "-id"],
+                include=["total_amount"],
+                name="history_user_date_idx",
+            ),
+            models.Index(fields=["date"], name="history_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.userprofile}'s history order on {self.date}"
+
+    @property
+    def first_course(self) -> str:
+        return self._get_dish_name(self.first_course_dish)
+
+    @property
+    def first_course_price(self) -> int:
+        return self._get_dish_price(self.first_course_dish)
+
+    @property
+    def second_course(self) -> str:
+        return self._get_dish_name(self.second_course_dish)
+
+    @property
+    def second_course_price(self) -> int:
+        return self._get_dish_price(self.second_course_dish)
+
+    @property
+    def dessert(self) -> str:
+        return self._get_dish_name(self.dessert_dish)
+
+    @property
+    def dessert_price(self) -> int:
+        return self._get_dish_price(self.dessert_dish)
+
+    @property
+    def drink(self) -> str:
+        return self._get_dish_name(self.drink_dish)
+
+    @property
+    def drink_price(self) -> int:
+        return self._get_dish_price(self.drink_dish)
+
+    @staticmethod
+    def _get_dish_name(dish: Dish | None) -> str:
+        """
+        Returns name of an ordered dish or the default value if it wasn't chosen
+        :param dish: Dish | None
+        :return: str
+        """
+        return dish.name if dish else FormDefaultValues.DISH_NOT_CHOSEN_DEFAULT_VALUE
+
+    @staticmethod
+    def _get_dish_price(dish: Dish | None) -> int:
+        """
+        Returns price of an ordered dish or the default value if it wasn't chosen
+        :param dish: Dish | None
+        :return: int
+        """
+        return (
+            dish.price
+            if dish
+            else FormDefaultValues.DISH_QUANTIRY_NOT_CHOSEN_DEFAULT_VALUE
+        )
+
+
+class WeeklyOrder(AbstractModel):
+    """
+    A user's order of the whole week in one row, used instead of `Order` and
+    `History` rows when `settings.WEEKLY_ORDER_STORAGE` is enabled
+    """
+
+    user = models.ForeignKey(
+        CustomUser,
+        related_name="weekly_orders",
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    week_start = models.DateField()
+    # {"<weekday number>": {"dishes": [dish id or null of every course],
+    # "quantities": [quantity of every course], "total_amount": int}}
+    days = models.JSONField()
+    exported_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-week_start"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "week_start"], name="unique_weekly_order_per_user"
+            )
+        ]
+        indexes = [models.Index(fields=["week_start"], name="weekly_order_week_idx")]
+
+    def __str__(self):
+        return f"{self.user.userprofile}'s order on week of {self.week_start}"
+
+
+class WeeklySpend(AbstractModel):
+    """
+    A user's spending of one ISO week, kept up to date by the transactions that
+    write the week's orders, so it never has to be re-derived from `History`
+    """
+
+    user = models.ForeignKey(
+        CustomUser,
+        related_name="weekly_spends",
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    iso_week = models.CharField(max_length=8)  # e.g. 2024-W01
+    total = models.PositiveIntegerField(default=0)
+    oversum = models.PositiveIntegerField(default=0)
+    days_ordered = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-iso_week"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "iso_week"], name="unique_weekly_spend_per_user"
+            )
+        ]
+        indexes = [models.Index(fields=["iso_week"], name="weekly_spend_week_idx")]
+
+    def __str__(self):
+        return f"{self.user.userprofile}'s spending on week {self.iso_week}"
+
+
+class DishDailyTotal(AbstractModel):
+    """
+    Running quantity of a dish ordered for a day, updated in the transactions
+    that write orders and removed once the day's orders have been sent
+    """
+
+    date = models.DateField()
+    course_type = models.CharField(
+        max_length=ValidationValues.course_type_max_length_value,
+        choices=CourseType.choices,
+    )
+    dish = models.CharField(max_length=ValidationValues.dish_name_max_length_value)
+    quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["date", "course_type", "dish"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "course_type", "dish"],
+                name="unique_dish_daily_total",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.dish} on {self.date}"
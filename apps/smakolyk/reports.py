@@ -0,0 +1,154 @@
+import csv
+from collections.abc import Iterable, Iterator
+from datetime import date
+from typing import BinaryIO
+
+from django.db.models import Case, Count, F, QuerySet, Sum, Value, When
+from django.db.models.functions import Greatest, TruncMonth
+from openpyxl import Workbook
+
+from .models import CourseType, DishDailyTotal, History
+from .values import ReportSettingValues, ViewSettingValues
+
+
+class _Echo:
+    """
+    File-like object that returns what is written to it, so `csv.writer` can
+    produce lines one by one
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def get_deduction_report(
+    date_from: date | None = None, date_to: date | None = None
+) -> QuerySet:
+    """
+    Returns monthly spending of every user that exceeded `MAX_ORDER_AMOUNT` on
+    any day, grouped by month and user in the DB
+    :param date_from: date | None
+    :param date_to: date | None
+    :return: QuerySet
+    """
+    history = History.objects.all()
+
+    if date_from:
+        history = history.filter(date__gte=date_from)
+    if date_to:
+        history = history.filter(date__lte=date_to)
+
+    return (
+        history.annotate(month=TruncMonth("date"))
+        .values(
+            "month",
+            "user__email",
+            "user__userprofile__first_name",
+            "user__userprofile__last_name",
+        )
+        .annotate(
+            days_ordered=Count("id"),
+            spent=Sum("total_amount"),
+            deduction=Sum(
+                Greatest(
+                    F("total_amount") - ViewSettingValues.MAX_ORDER_AMOUNT, Value(0)
+                )
+            ),
+        )
+        .filter(deduction__gt=0)
+        .order_by("month", "user__userprofile__last_name", "user__email")
+        .values_list(
+            "month",
+            "user__email",
+            "user__userprofile__first_name",
+            "user__userprofile__last_name",
+            "days_ordered",
+            "spent",
+            "deduction",
+        )
+    )
+
+
+def get_kitchen_summary() -> QuerySet:
+    """
+    Returns ordered quantities of every dish per day, read from the running
+    totals kept up to date by the transactions that save orders
+    :return: QuerySet
+    """
+    return (
+        DishDailyTotal.objects.filter(quantity__gt=0)
+        .annotate(
+            course=Case(
+                *[
+                    When(course_type=course_type, then=Value(label))
+                    for course_type, label in CourseType.choices
+                ]
+            )
+        )
+        .order_by("date", "course", "dish")
+        .values_list("date", "course", "dish", "quantity")
+    )
+
+
+def iterate_deduction_report_rows(report: QuerySet) -> Iterator[tuple]:
+    """
+    Yields report rows read from the DB in chunks, with months formatted
+    :param report: QuerySet
+    :return: Iterator[tuple]
+    """
+    for month, *row in report.iterator(chunk_size=ReportSettingValues.CHUNK_SIZE):
+        yield month.strftime(ReportSettingValues.MONTH_FORMAT), *row
+
+
+def iterate_deduction_report_csv(rows: Iterable[tuple]) -> Iterator[str]:
+    """
+    Yields the report as CSV lines, starting with the header
+    :param rows: Iterable[tuple]
+    :return: Iterator[str]
+    """
+    writer = csv.writer(_Echo())
+
+    yield writer.writerow(ReportSettingValues.DEDUCTION_REPORT_COLUMNS)
+
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_deduction_report_xlsx(rows: Iterable[tuple], file: BinaryIO) -> None:
+    """
+    Writes the report to an XLSX file
+    :param rows: Iterable[tuple]
+    :param file: BinaryIO
+    :return: None
+    """
+    write_xlsx(
+        file,
+        (
+            ReportSettingValues.DEDUCTION_REPORT_SHEET_NAME,
+            ReportSettingValues.DEDUCTION_REPORT_COLUMNS,
+            rows,
+        ),
+    )
+
+
+def write_xlsx(
+    file: BinaryIO, *sheets: tuple[str, tuple[str, ...], Iterable[tuple]]
+) -> None:
+    """
+    Writes (sheet name, columns, rows) sheets to an XLSX file. The workbook is
+    write-only, so rows are flushed to a temporary file as they come instead of
+    being kept in memory
+    :param file: BinaryIO
+    :param sheets: tuple[str, tuple[str, ...], Iterable[tuple]]
+    :return: None
+    """
+    workbook = Workbook(write_only=True)
+
+    for sheet_name, columns, rows in sheets:
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append(columns)
+
+        for row in rows:
+            worksheet.append(row)
+
+    workbook.save(file)
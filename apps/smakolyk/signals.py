@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import invalidate_menu_catalog
+from .models import Dish, History, WeeklyOrder
+from .storage import invalidate_week_history, remove_weekly_spend
+
+
+@receiver([post_save, post_delete], sender=Dish)
+def invalidate_menu_catalog_on_dish_change(sender, **kwargs) -> None:
+    """
+    Bumps the menu version whenever a dish is changed outside of `save_menu`
+    :param sender: Dish
+    :return: None
+    """
+    invalidate_menu_catalog()
+
+
+@receiver([post_save, post_delete], sender=History)
+def invalidate_week_history_on_history_change(
+    sender, instance: History, **kwargs
+) -> None:
+    """
+    Drops cached history of the week whenever a day is changed outside of
+    `OrderFormSet.save`
+    :param sender: History
+    :param instance: History
+    :return: None
+    """
+    transaction.on_commit(
+        lambda: invalidate_week_history(instance.user_id, [instance.date])
+    )
+
+
+@receiver([post_save, post_delete], sender=WeeklyOrder)
+def invalidate_week_history_on_weekly_order_change(
+    sender, instance: WeeklyOrder, **kwargs
+) -> None:
+    """
+    Drops cached history of the week whenever a weekly order is changed
+    :param sender: WeeklyOrder
+    :param instance: WeeklyOrder
+    :return: None
+    """
+    transaction.on_commit(
+        lambda: invalidate_week_history(instance.user_id, [instance.week_start])
+    )
+
+
+@receiver(post_delete, sender=History)
+def remove_weekly_spend_on_history_delete(sender, instance: History, **kwargs) -> None:
+    """
+    Subtracts a deleted day from the user's weekly spending, as days are only
+    deleted outside of the order forms
+    :param sender: History
+    :param instance: History
+    :return: None
+    """
+    remove_weekly_spend(instance.user_id, [instance.date], [instance.total_amount])
+
+
+@receiver(post_delete, sender=WeeklyOrder)
+def remove_weekly_spend_on_weekly_order_delete(
+    sender, instance: WeeklyOrder, **kwargs
+) -> None:
+    """
+    Subtracts days of a deleted weekly order from the user's weekly spending
+    :param sender: WeeklyOrder
+    :param instance: WeeklyOrder
+    :return: None
+    """
+    remove_weekly_spend(
+        instance.user_id,
+        [
+            instance.week_start + timedelta(days=int(weekday))
+            for weekday in instance.days
+        ],
+        [day["total_amount"] for day in instance.days.values()],
+    )
@@ -67,7 +67,13 @@ document.addEventListener("DOMContentLoaded", function (){
                     document.getElementById(`${weekday}-total-amount`).innerText = history_data[weekday]["total_amount"];
                 }
 
-                set_total_week_amount();
+                // The week's total is precomputed on the server, weeks ordered before
+                // it was kept have their days summed up instead
+                const week_total = data["week_spend"]
+                    ? data["week_spend"]["total"]
+                    : Object.values(history_data).reduce((total, day) => total + day["total_amount"], 0);
+
+                document.getElementById('total').innerText = "Total : " + week_total + cerrensy_symbol;
             }
         })
         .catch(error => {
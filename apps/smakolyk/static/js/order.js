@@ -81,63 +81,103 @@ function getCSRFToken() {
     return document.getElementsByName('csrfmiddlewaretoken')[0].value;
 }
 
+async function fetch_published_menu_prices() {
+    // The pointer is always revalidated, the menu file itself is content-hashed
+    const pointer_response = await fetch('/media/menu/current.json', {cache: 'no-cache'});
+
+    if (!pointer_response.ok) {
+        throw new Error('Published menu is not available ' + pointer_response.statusText);
+    }
+
+    const pointer = await pointer_response.json();
+    const menu_response = await fetch(pointer.url);
+
+    if (!menu_response.ok) {
+        throw new Error('Published menu is not available ' + menu_response.statusText);
+    }
+
+    const menu = await menu_response.json();
+    return menu.prices;
+}
+
 document.addEventListener('DOMContentLoaded', async () => {
     try {
-        const response = await fetch('/set-price/');
-        const data = await response.json();
-        all_dish_prices = data.response;
+        all_dish_prices = await fetch_published_menu_prices();
 
     } catch (error) {
-        alert("Dish prices are not available. Please, try again later.");
+        try {
+            const response = await fetch('/set-price/');
+            const data = await response.json();
+            all_dish_prices = data.response;
+
+        } catch (error) {
+            alert("Dish prices are not available. Please, try again later.");
+        }
     }
 });
 
-function get_total_amount(form_number) {
-    let form_data = {};
+// Changes made in quick succession are sent to the server as one request
+const WEEK_TOTALS_DEBOUNCE_MS = 300;
+let week_totals_timeout;
+let deducted_days = new Set();
 
-    for (const field_name of DataMappingValues.dish_quantity_field_names) {
-        let result_value = parseInt(document.getElementById(`id_form-${form_number}-${field_name}`).value);
+function get_week_selections() {
+    let days = [];
 
-        if (isNaN(result_value)) {
-            result_value = 0;
-        }
-        form_data[field_name] = result_value;
-    }
+    for (let form_number = 0; form_number < all_day_divs.length; form_number++) {
+        let day = {};
 
-    for (const [index, field_name] of DataMappingValues.dish_price_field_names.map(
-                (value, index) => [index, value]
-            )
-        ) {
-        let result_value = parseInt(
-            all_dish_prices[
-                DataMappingValues.dish_field_names[index]][
-                    document.getElementById(`id_form-${form_number}-${DataMappingValues.dish_field_names[index]}`).value
-                ]
-        );
-
-        if (isNaN(result_value)) {
-            result_value = 0;
+        for (const [index, field_name] of DataMappingValues.dish_field_names.entries()) {
+            const quantity_field_name = DataMappingValues.dish_quantity_field_names[index];
+
+            day[field_name] = document.getElementById(`id_form-${form_number}-${field_name}`).value;
+            day[quantity_field_name] = parseInt(
+                document.getElementById(`id_form-${form_number}-${quantity_field_name}`).value
+            ) || 0;
         }
-        form_data[field_name] = result_value;
+        days.push(day);
     }
 
-    return fetch('/set-total-price/', {
+    return days;
+}
+
+function update_week_totals() {
+    return fetch('/set-week-total-price/', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
             'X-CSRFToken': getCSRFToken()
         },
-        body: JSON.stringify(form_data)
+        body: JSON.stringify({days: get_week_selections()})
     })
     .then(response => response.json())
     .then(data => {
-        return data;
+        let current_deducted_days = new Set();
+
+        data.response.forEach((day, index) => {
+            document.getElementById(`grn${index + 1}`).textContent = day.remaining_amount;
+
+            if (day.amount_deducted) {
+                current_deducted_days.add(index);
+            }
+        });
+
+        if ([...current_deducted_days].some(index => !deducted_days.has(index))) {
+            alert("You overcame the limit. The difference will be deducted from your salary.");
+        }
+
+        deducted_days = current_deducted_days;
     })
     .catch(error => {
         console.error('Error:', error);
     });
 }
 
+function schedule_week_totals_update() {
+    clearTimeout(week_totals_timeout);
+    week_totals_timeout = setTimeout(update_week_totals, WEEK_TOTALS_DEBOUNCE_MS);
+}
+
 function set_first_sourse_select_options(
     first_course_select, first_course_price, fist_course_quantity, currency_amount, form_number
 ) {
@@ -149,13 +189,7 @@ function set_first_sourse_select_options(
         } else if (parseInt(fist_course_quantity.value) > 0) {
             first_course_price.innerHTML = "<p>" + (parseInt(fist_course_quantity.value) * parseInt(all_dish_prices['first_course'][first_course_select.value])) + "</p>";
 
-            get_total_amount(form_number).then(data => {
-                if (data.amount_deducted) {
-                    alert("You overcame the limit. The difference will be deducted from your salary.");
-                }
-
-                currency_amount.textContent = data.response;
-            });
+            schedule_week_totals_update();
 
         } else {
             first_course_price.innerHTML = "<p>0</p>";
@@ -172,13 +206,7 @@ function set_first_course_quantity_options(first_course_select, first_course_pri
        } else if (first_course_select.value) {
            first_course_price.innerHTML = "<p>" + (parseInt(fist_course_quantity.value) * parseInt(all_dish_prices['first_course'][first_course_select.value])) + "</p>";
 
-           get_total_amount(form_number).then(data => {
-                if (data.amount_deducted) {
-                    alert("You overcame the limit. The difference will be deducted from your salary.");
-                }
-
-                currency_amount.textContent = data.response;
-            });
+           schedule_week_totals_update();
 
        } else {
            first_course_price.innerHTML = "<p>0</p>";
@@ -194,13 +222,7 @@ function set_second_sourse_select_options(second_course_select, second_course_pr
         } else if (parseInt(second_course_quantity.value) > 0) {
             second_course_price.innerHTML = "<p>" + (parseInt(second_course_quantity.value) * parseInt(all_dish_prices['second_course'][second_course_select.value])) + "</p>";
 
-            get_total_amount(form_number).then(data => {
-                if (data.amount_deducted) {
-                    alert("You overcame the limit. The difference will be deducted from your salary.");
-                }
-
-                currency_amount.textContent = data.response;
-            });
+            schedule_week_totals_update();
         } else {
             second_course_price.innerHTML = "<p>0</p>";
             second_course_quantity.value = 0;
@@ -216,13 +238,7 @@ function set_second_course_quantity_options(second_course_select, second_course_
        } else if (second_course_select.value) {
            second_course_price.innerHTML = "<p>" + (parseInt(second_course_quantity.value) * parseInt(all_dish_prices['second_course'][second_course_select.value])) + "</p>";
 
-           get_total_amount(form_number).then(data => {
-                if (data.amount_deducted) {
-                    alert("You overcame the limit. The difference will be deducted from your salary.");
-                }
-
-                currency_amount.textContent = data.response;
-           });
+           schedule_week_totals_update();
 
        } else {
            second_course_price.innerHTML = "<p>0</p>";
@@ -238,13 +254,7 @@ function set_dessert_select_options(dessert_select, dessert_price, dessert_quant
         } else if (parseInt(dessert_quantity.value) > 0) {
             dessert_price.innerHTML = "<p>" + (parseInt(dessert_quantity.value) * parseInt(all_dish_prices['dessert'][dessert_select.value])) + "</p>";
 
-            get_total_amount(form_number).then(data => {
-                if (data.amount_deducted) {
-                    alert("You overcame the limit. The difference will be deducted from your salary.");
-                }
-
-                currency_amount.textContent = data.response;
-            });
+            schedule_week_totals_update();
         } else {
             dessert_price.innerHTML = "<p>0</p>";
             dessert_quantity.value = 0;
@@ -261,13 +271,7 @@ function set_dessert_quantity_options(dessert_select, dessert_price, dessert_qua
 
            dessert_price.innerHTML = "<p>" + (parseInt(dessert_quantity.value) * parseInt(all_dish_prices['dessert'][dessert_select.value])) + "</p>";
 
-           get_total_amount(form_number).then(data => {
-                if (data.amount_deducted) {
-                    alert("You overcame the limit. The difference will be deducted from your salary.");
-                }
-
-                currency_amount.textContent = data.response;
-           });
+           schedule_week_totals_update();
 
        } else {
            dessert_price.innerHTML = "<p>0</p>";
@@ -283,13 +287,7 @@ function set_drink_select_options(drink_select, drink_price, drink_quantity, cur
         } else if (parseInt(drink_quantity.value) > 0) {
             drink_price.innerHTML = "<p>" + (parseInt(drink_quantity.value) * parseInt(all_dish_prices['drink'][drink_select.value])) + "</p>";
 
-            get_total_amount(form_number).then(data => {
-                if (data.amount_deducted) {
-                    alert("You overcame the limit. The difference will be deducted from your salary.");
-                }
-
-                currency_amount.textContent = data.response;
-            });
+            schedule_week_totals_update();
         } else {
             drink_price.innerHTML = "<p>0</p>";
             drink_quantity.value = 0;
@@ -305,13 +303,7 @@ function set_drink_quantity_options(drink_select, drink_price, drink_quantity, c
        } else if (drink_select.value) {
            drink_price.innerHTML = "<p>" + (parseInt(drink_quantity.value) * parseInt(all_dish_prices['drink'][drink_select.value])) + "</p>";
 
-           get_total_amount(form_number).then(data => {
-                if (data.amount_deducted) {
-                    alert("You overcame the limit. The difference will be deducted from your salary.");
-                }
-
-                currency_amount.textContent = data.response;
-           });
+           schedule_week_totals_update();
 
        } else {
            drink_price.innerHTML = "<p>0</p>";
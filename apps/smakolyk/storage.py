@@ -0,0 +1,712 @@
+import json
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, timedelta
+from uuid import UUID, uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F, Q, QuerySet
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.user.models import CustomUser
+
+from .catalog import MenuCatalog
+from .models import Dish, DishDailyTotal, History, Order, WeeklyOrder, WeeklySpend
+from .partitions import create_order_partitions, drop_order_partitions
+from .values import (
+    ISO_WEEK_FORMAT,
+    ORDERS_EXPORT_LOCK_ID,
+    CacheSettingValues,
+    DataMappingValues,
+    FormDefaultValues,
+    TaskSettingValues,
+    ViewSettingValues,
+)
+
+
+@dataclass(frozen=True)
+class WeekdayOrder:
+    """
+    One day of a `WeeklyOrder`, read with the same fields as `Order` and `History`
+    """
+
+    date: date
+    total_amount: int
+    first_course: str
+    first_course_quantity: int
+    first_course_price: int
+    second_course: str
+    second_course_quantity: int
+    second_course_price: int
+    dessert: str
+    dessert_quantity: int
+    dessert_price: int
+    drink: str
+    drink_quantity: int
+    drink_price: int
+
+    @classmethod
+    def from_payload(
+        cls, date_: date, payload: dict, dishes: dict[UUID, Dish]
+    ) -> "WeekdayOrder":
+        """
+        Builds a day from its `WeeklyOrder.days` payload
+        :param date_: date
+        :param payload: dict
+        :param dishes: dict[UUID, Dish]
+        :return: WeekdayOrder
+        """
+        fields = dict()
+
+        for field_name, quantity_field_name, price_field_name, dish_id, quantity in zip(
+            DataMappingValues.dish_field_names,
+            DataMappingValues.dish_quantity_field_names,
+            DataMappingValues.dish_price_field_names,
+            payload["dishes"],
+            payload["quantities"],
+        ):
+            dish = dishes.get(UUID(dish_id)) if dish_id else None
+
+            fields[field_name] = (
+                dish.name if dish else FormDefaultValues.DISH_NOT_CHOSEN_DEFAULT_VALUE
+            )
+            fields[quantity_field_name] = quantity
+            fields[price_field_name] = (
+                dish.price
+                if dish
+                else FormDefaultValues.DISH_QUANTIRY_NOT_CHOSEN_DEFAULT_VALUE
+            )
+
+        return cls(date=date_, total_amount=payload["total_amount"], **fields)
+
+
+def is_weekly_order_storage() -> bool:
+    """
+    Returns True if orders are stored as one `WeeklyOrder` row per user and week
+    :return: bool
+    """
+    return settings.WEEKLY_ORDER_STORAGE
+
+
+def get_week_start(date_: date) -> date:
+    """
+    Returns Monday of the week `date_` belongs to
+    :param date_: date
+    :return: date
+    """
+    return date_ - timedelta(days=date_.weekday())
+
+
+def get_iso_week(date_: date) -> str:
+    """
+    Returns the ISO week `date_` belongs to, e.g. 2024-W01
+    :param date_: date
+    :return: str
+    """
+    return date_.strftime(ISO_WEEK_FORMAT)
+
+
+def get_week_spends(dates: list[date], total_amounts: list[int]) -> dict[str, dict]:
+    """
+    Returns `WeeklySpend` counters of the ordered days, summed per ISO week
+    :param dates: list[date]
+    :param total_amounts: list[int]
+    :return: dict[str, dict]
+    """
+    weeks = defaultdict(lambda: {"total": 0, "oversum": 0, "days_ordered": 0})
+
+    for date_, total_amount in zip(dates, total_amounts):
+        week = weeks[get_iso_week(date_)]
+        week["total"] += total_amount
+        week["oversum"] += max(total_amount - ViewSettingValues.MAX_ORDER_AMOUNT, 0)
+        week["days_ordered"] += 1
+
+    return weeks
+
+
+def record_weekly_spend(
+    user_id: UUID, dates: list[date], total_amounts: list[int]
+) -> None:
+    """
+    Adds ordered days to the user's `WeeklySpend` rows. Must be called in the
+    transaction that saves the orders, so the summary can't drift from them
+    :param user_id: UUID
+    :param dates: list[date]
+    :param total_amounts: list[int]
+    :return: None
+    """
+    weeks = get_week_spends(dates, total_amounts)
+
+    # Rows are created empty and then incremented in place, so concurrent orders
+    # of the same week add up instead of overwriting each other
+    WeeklySpend.objects.bulk_create(
+        [WeeklySpend(user_id=user_id, iso_week=iso_week) for iso_week in weeks],
+        ignore_conflicts=True,
+    )
+
+    for iso_week, week in weeks.items():
+        WeeklySpend.objects.filter(user_id=user_id, iso_week=iso_week).update(
+            **{field_name: F(field_name) + value for field_name, value in week.items()}
+        )
+
+    transaction.on_commit(
+        lambda: cache.delete(CacheSettingValues.HAS_ORDERS_KEY.format(user_id=user_id))
+    )
+
+
+def remove_weekly_spend(
+    user_id: UUID, dates: list[date], total_amounts: list[int]
+) -> None:
+    """
+    Subtracts deleted days from the user's `WeeklySpend` rows, weeks without
+    ordered days left are removed. Must be called in the transaction that
+    deletes the orders
+    :param user_id: UUID
+    :param dates: list[date]
+    :param total_amounts: list[int]
+    :return: None
+    """
+    weeks = get_week_spends(dates, total_amounts)
+
+    for iso_week, week in weeks.items():
+        WeeklySpend.objects.filter(user_id=user_id, iso_week=iso_week).update(
+            **{
+                field_name: Greatest(F(field_name) - value, 0)
+                for field_name, value in week.items()
+            }
+        )
+
+    WeeklySpend.objects.filter(
+        user_id=user_id, iso_week__in=weeks, days_ordered=0
+    ).delete()
+    transaction.on_commit(
+        lambda: cache.delete(CacheSettingValues.HAS_ORDERS_KEY.format(user_id=user_id))
+    )
+
+
+def record_dish_daily_totals(orders: list[Order | WeekdayOrder]) -> None:
+    """
+    Adds quantities of ordered dishes to their `DishDailyTotal` rows in one
+    upsert. Must be called in the transaction that saves the orders
+    :param orders: list[Order | WeekdayOrder]
+    :return: None
+    """
+    totals = defaultdict(int)
+
+    for order in orders:
+        for field_name, quantity_field_name in zip(
+            DataMappingValues.dish_field_names,
+            DataMappingValues.dish_quantity_field_names,
+        ):
+            dish = getattr(order, field_name)
+            quantity = getattr(order, quantity_field_name)
+
+            if quantity and dish != FormDefaultValues.DISH_NOT_CHOSEN_DEFAULT_VALUE:
+                totals[(order.date, field_name, dish)] += quantity
+
+    if not totals:
+        return
+
+    # The ORM can only overwrite conflicting rows, while concurrent orders of the
+    # same dish have to be added up
+    table_name = DishDailyTotal._meta.db_table
+    now = timezone.now()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table_name} "
+            "(id, created_at, updated_at, date, course_type, dish, quantity) "
+            f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(totals))} "
+            "ON CONFLICT (date, course_type, dish) DO UPDATE SET "
+            f"quantity = {table_name}.quantity + EXCLUDED.quantity, "
+            "updated_at = EXCLUDED.updated_at",
+            [
+                value
+                for (date_, course_type, dish), quantity in totals.items()
+                for value in (uuid4(), now, now, date_, course_type, dish, quantity)
+            ],
+        )
+
+
+def build_weekly_order(
+    orders: list[Order], total_amounts: list[int], catalog: MenuCatalog
+) -> WeeklyOrder:
+    """
+    Returns an unsaved `WeeklyOrder` holding `orders` of one user and week
+    :param orders: list[Order]
+    :param total_amounts: list[int]
+    :param catalog: MenuCatalog
+    :return: WeeklyOrder
+    """
+    days = dict()
+
+    for order, total_amount in zip(orders, total_amounts):
+        dish_ids = [
+            catalog.get_dish_id(field_name, getattr(order, field_name))
+            for field_name in DataMappingValues.dish_field_names
+        ]
+        days[str(order.date.weekday())] = {
+            "dishes": [str(dish_id) if dish_id else None for dish_id in dish_ids],
+            "quantities": [
+                getattr(order, field_name)
+                for field_name in DataMappingValues.dish_quantity_field_names
+            ],
+            "total_amount": total_amount,
+        }
+
+    return WeeklyOrder(
+        user=orders[0].user, week_start=get_week_start(orders[0].date), days=days
+    )
+
+
+def get_weekday_orders(
+    weekly_orders: list[WeeklyOrder],
+) -> list[tuple[WeeklyOrder, WeekdayOrder]]:
+    """
+    Splits weekly orders into days, reading their dishes in one query
+    :param weekly_orders: list[WeeklyOrder]
+    :return: list[tuple[WeeklyOrder, WeekdayOrder]]
+    """
+    dishes = Dish.objects.in_bulk(
+        {
+            dish_id
+            for weekly_order in weekly_orders
+            for payload in weekly_order.days.values()
+            for dish_id in payload["dishes"]
+            if dish_id
+        }
+    )
+
+    return [
+        (
+            weekly_order,
+            WeekdayOrder.from_payload(
+                weekly_order.week_start + timedelta(days=int(weekday)),
+                payload,
+                dishes,
+            ),
+        )
+        for weekly_order in weekly_orders
+        for weekday, payload in sorted(weekly_order.days.items())
+    ]
+
+
+def get_user_spend(user_id: UUID) -> QuerySet:
+    """
+    Returns the user's `WeeklySpend` rows, one for every week the user ordered in
+    :param user_id: UUID
+    :return: QuerySet
+    """
+    return WeeklySpend.objects.filter(user_id=user_id)
+
+
+def user_has_orders(user_id: UUID) -> bool:
+    """
+    Returns True if the user has ever ordered. The answer is cached until the
+    user's spending is recorded again
+    :param user_id: UUID
+    :return: bool
+    """
+    return cache.get_or_set(
+        CacheSettingValues.HAS_ORDERS_KEY.format(user_id=user_id),
+        lambda: get_user_spend(user_id).exists(),
+        CacheSettingValues.HAS_ORDERS_TIMEOUT,
+    )
+
+
+def is_week_ordered(user_id: UUID, dates: list[date]) -> bool:
+    """
+    Returns True if the user has an order for any of `dates`
+    :param user_id: UUID
+    :param dates: list[date]
+    :return: bool
+    """
+    if is_weekly_order_storage():
+        return WeeklyOrder.objects.filter(
+            user_id=user_id, week_start__in={get_week_start(date_) for date_ in dates}
+        ).exists()
+
+    return Order.objects.filter(
+        user_id=user_id, date__range=(dates[0], dates[-1])
+    ).exists()
+
+
+def get_week_history(
+    user_id: UUID, dates: list[date | str]
+) -> list[History | WeekdayOrder | None]:
+    """
+    Returns the user's orders for each of `dates`, None for days without an order
+    :param user_id: UUID
+    :param dates: list[date | str]
+    :return: list[History | WeekdayOrder | None]
+    """
+    dates = [date.fromisoformat(str(date_)) for date_ in dates]
+
+    if not is_weekly_order_storage():
+        history = {
+            history_object.date: history_object
+            for history_object in History.objects.for_display().filter(
+                user_id=user_id, date__in=dates
+            )
+        }
+
+        return [history.get(date_) for date_ in dates]
+
+    weekly_orders = WeeklyOrder.objects.filter(
+        user_id=user_id, week_start__in={get_week_start(date_) for date_ in dates}
+    )
+    days = {day.date: day for _, day in get_weekday_orders(list(weekly_orders))}
+
+    return [days.get(date_) for date_ in dates]
+
+
+def get_history_after(
+    user_id: UUID, cursor_date: date | None, cursor_id: UUID | None
+) -> QuerySet:
+    """
+    Returns the user's history that follows the cursor, newest first
+    :param user_id: UUID
+    :param cursor_date: date | None
+    :param cursor_id: UUID | None
+    :return: QuerySet
+    """
+    history = (
+        History.objects.for_display().filter(user_id=user_id).order_by("-date", "-id")
+    )
+
+    # The OR can't bound the index scan, the redundant `date__lte` starts it at
+    # the cursor, so deep pages don't read and filter out all newer rows
+    if cursor_id:
+        return history.filter(
+            Q(date__lt=cursor_date) | Q(date=cursor_date, id__lt=cursor_id),
+            date__lte=cursor_date,
+        )
+
+    if cursor_date:
+        return history.filter(date__lt=cursor_date)
+
+    return history
+
+
+def get_history_page(
+    user_id: UUID, cursor: str | None, limit: int
+) -> tuple[list[History | WeekdayOrder], str | None]:
+    """
+    Returns a page of the user's history, newest first, and the cursor of the next
+    page. Pages are sought by (date, id) of the previous page's last row instead of
+    OFFSET, so old pages cost as much as the first one
+    :param user_id: UUID
+    :param cursor: str | None
+    :param limit: int
+    :return: tuple[list[History | WeekdayOrder], str | None]
+    """
+    cursor_date, cursor_id = parse_history_cursor(cursor) if cursor else (None, None)
+
+    if not is_weekly_order_storage():
+        rows = list(get_history_after(user_id, cursor_date, cursor_id)[: limit + 1])
+    else:
+        weekly_orders = WeeklyOrder.objects.filter(user_id=user_id).order_by(
+            "-week_start"
+        )
+
+        if cursor_date:
+            weekly_orders = weekly_orders.filter(
+                week_start__lte=get_week_start(cursor_date)
+            )
+
+        # Every week has at least one day, the extra one is the cursor's week
+        days = sorted(
+            (day for _, day in get_weekday_orders(list(weekly_orders[: limit + 2]))),
+            key=lambda day: day.date,
+            reverse=True,
+        )
+        rows = [day for day in days if not cursor_date or day.date < cursor_date]
+        rows = rows[: limit + 1]
+
+    if len(rows) > limit:
+        return rows[:limit], get_history_cursor(rows[limit - 1])
+
+    return rows, None
+
+
+def get_history_cursor(history_object: History | WeekdayOrder) -> str:
+    """
+    Returns the cursor of the page that follows `history_object`.
+    Days of weekly orders are unique per user, so their date is enough
+    :param history_object: History | WeekdayOrder
+    :return: str
+    """
+    if isinstance(history_object, History):
+        return f"{history_object.date.isoformat()}_{history_object.id}"
+
+    return history_object.date.isoformat()
+
+
+def parse_history_cursor(cursor: str) -> tuple[date, UUID | None]:
+    """
+    Returns the date and id a cursor points to. Raises ValueError if it's invalid
+    :param cursor: str
+    :return: tuple[date, UUID | None]
+    """
+    date_, _, id_ = cursor.partition("_")
+
+    return date.fromisoformat(date_), UUID(id_) if id_ else None
+
+
+def get_week_history_key(user_id: UUID, date_: date) -> str:
+    """
+    Returns the cache key of the user's history for the ISO week of `date_`
+    :param user_id: UUID
+    :param date_: date
+    :return: str
+    """
+    return CacheSettingValues.HISTORY_WEEK_KEY.format(
+        user_id=user_id, iso_week=get_iso_week(date_)
+    )
+
+
+def get_week_history_payload(user_id: UUID, date_: date) -> str:
+    """
+    Returns the user's history for the week of `date_` serialized to JSON,
+    built once per week and then read from the cache
+    :param user_id: UUID
+    :param date_: date
+    :return: str
+    """
+    key = get_week_history_key(user_id, date_)
+
+    if (payload := cache.get(key)) is not None:
+        return payload
+
+    week_start = get_week_start(date_)
+    week_dates = [
+        week_start + timedelta(days=day)
+        for day in range(ViewSettingValues.FORMS_NUMBER)
+    ]
+    week_history = get_week_history(user_id, week_dates)
+
+    if any(week_history):
+        history_data = {
+            weekday_name.lower(): day
+            for weekday_name, day in zip(
+                ViewSettingValues.WEEKDAY_NAMES,
+                get_week_history_data(week_dates, week_history),
+            )
+        }
+        week_spend = (
+            WeeklySpend.objects.filter(user_id=user_id, iso_week=get_iso_week(date_))
+            .values("total", "oversum", "days_ordered")
+            .first()
+        )
+        payload = {
+            "history_data": history_data,
+            "week_spend": week_spend,
+            "date_exists": True,
+        }
+    else:
+        payload = {"date_exists": False}
+
+    payload = json.dumps(payload, cls=DjangoJSONEncoder)
+    cache.set(key, payload, CacheSettingValues.HISTORY_WEEK_TIMEOUT)
+
+    return payload
+
+
+def get_week_history_data(
+    dates: list[date], week_history: list[History | WeekdayOrder | None]
+) -> list[dict]:
+    """
+    Returns history fields of every day of `get_week_history`, days the user
+    hasn't ordered for are filled with placeholders
+    :param dates: list[date]
+    :param week_history: list[History | WeekdayOrder | None]
+    :return: list[dict]
+    """
+    return [
+        (
+            {
+                field_name: getattr(history_object, field_name)
+                for field_name in ViewSettingValues.HISTORY_OBJECT_FIELDS
+            }
+            if history_object
+            else get_empty_history_data(date_)
+        )
+        for date_, history_object in zip(dates, week_history)
+    ]
+
+
+def get_empty_history_data(date_: date) -> dict:
+    """
+    Returns history fields of a day the user hasn't ordered for
+    :param date_: date
+    :return: dict
+    """
+    return (
+        {
+            field_name: FormDefaultValues.DISH_NOT_CHOSEN_DEFAULT_VALUE
+            for field_name in DataMappingValues.dish_field_names
+        }
+        | {
+            field_name: FormDefaultValues.DISH_QUANTIRY_NOT_CHOSEN_DEFAULT_VALUE
+            for field_name in DataMappingValues.dish_quantity_field_names
+            + DataMappingValues.dish_price_field_names
+        }
+        | {"date": date_, "total_amount": 0}
+    )
+
+
+def invalidate_week_history(user_id: UUID, dates: Iterable[date]) -> None:
+    """
+    Drops cached history of the user's weeks `dates` belong to
+    :param user_id: UUID
+    :param dates: Iterable[date]
+    :return: None
+    """
+    cache.delete_many({get_week_history_key(user_id, date_) for date_ in dates})
+
+
+def get_pending_weekly_orders() -> list[tuple[CustomUser, WeekdayOrder]]:
+    """
+    Returns days of weekly orders that haven't been exported yet. They're
+    marked as exported by `remove_exported_orders`, unlike `Order` rows they
+    aren't deleted, as they're also history
+    :return: list[tuple[CustomUser, WeekdayOrder]]
+    """
+    weekly_orders = (
+        WeeklyOrder.objects.filter(exported_at__isnull=True)
+        .select_related("user__userprofile")
+        .order_by("week_start", "user_id")
+    )
+
+    return [
+        (weekly_order.user, day)
+        for weekly_order, day in get_weekday_orders(list(weekly_orders))
+    ]
+
+
+def get_pending_orders_state() -> tuple[int, int]:
+    """
+    Returns the number of orders waiting for export and a checksum of their
+    rows, which change whenever an order is added, removed or updated, even by
+    `QuerySet.update()` that leaves `updated_at` as it was
+    :return: tuple[int, int]
+    """
+    if is_weekly_order_storage():
+        table_name, condition = WeeklyOrder._meta.db_table, "exported_at IS NULL"
+    else:
+        table_name, condition = Order._meta.db_table, "TRUE"
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*), COALESCE(SUM(hashtext(pending::text)), 0) "
+            f"FROM {table_name} pending WHERE {condition}"
+        )
+
+        return cursor.fetchone()
+
+
+def rebuild_dish_daily_totals() -> None:
+    """
+    Counts dish totals anew from the orders waiting for export in one query.
+    Quantities of orders deleted or updated without `record_dish_daily_totals`
+    are dropped. Must be called after `lock_pending_orders`
+    :return: None
+    """
+    if is_weekly_order_storage():
+        # Dishes and quantities of a day are listed in the order of the courses
+        pending_dishes_sql = (
+            "SELECT weekly_order.week_start + day.key::integer AS date, "
+            "course.course_type, dish.name AS dish, "
+            "(day.value -> 'quantities' ->> (course.position - 1)::integer)::integer "
+            "AS quantity "
+            f"FROM {WeeklyOrder._meta.db_table} weekly_order "
+            "CROSS JOIN LATERAL jsonb_each(weekly_order.days) day "
+            "CROSS JOIN LATERAL unnest(%s::varchar[]) "
+            "WITH ORDINALITY course(course_type, position) "
+            f"JOIN {Dish._meta.db_table} dish "
+            "ON dish.id = (day.value -> 'dishes' ->> (course.position - 1)::integer)::uuid "
+            "WHERE weekly_order.exported_at IS NULL"
+        )
+        params = [list(DataMappingValues.dish_field_names)]
+    else:
+        pending_dishes_sql = " UNION ALL ".join(
+            f"SELECT date, %s AS course_type, {field_name} AS dish, "
+            f"{quantity_field_name} AS quantity FROM {Order._meta.db_table} "
+            f"WHERE {field_name} <> %s"
+            for field_name, quantity_field_name in zip(
+                DataMappingValues.dish_field_names,
+                DataMappingValues.dish_quantity_field_names,
+            )
+        )
+        params = [
+            value
+            for field_name in DataMappingValues.dish_field_names
+            for value in (field_name, FormDefaultValues.DISH_NOT_CHOSEN_DEFAULT_VALUE)
+        ]
+
+    table_name = DishDailyTotal._meta.db_table
+    now = timezone.now()
+    DishDailyTotal.objects.all().delete()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table_name} "
+            "(id, created_at, updated_at, date, course_type, dish, quantity) "
+            "SELECT gen_random_uuid(), %s, %s, date, course_type, dish, SUM(quantity) "
+            f"FROM ({pending_dishes_sql}) pending_dishes WHERE quantity > 0 "
+            "GROUP BY date, course_type, dish",
+            [now, now, *params],
+        )
+
+
+def lock_pending_orders() -> None:
+    """
+    Locks the table of orders waiting for export against writes until the end
+    of the transaction, so nothing is saved between the export and the removal.
+    Exports take turns before that, as a refresh rebuilding dish totals and the
+    Friday send dropping partitions would otherwise deadlock
+    :return: None
+    """
+    model = WeeklyOrder if is_weekly_order_storage() else Order
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [ORDERS_EXPORT_LOCK_ID])
+        cursor.execute(f"LOCK TABLE {model._meta.db_table} IN SHARE MODE")
+
+
+def remove_exported_orders() -> None:
+    """
+    Removes all orders waiting for export by dropping their partitions, or marks
+    weekly orders as exported, together with their dish totals. Must be called
+    after `lock_pending_orders`
+    :return: None
+    """
+    if is_weekly_order_storage():
+        WeeklyOrder.objects.filter(exported_at__isnull=True).update(
+            exported_at=timezone.now()
+        )
+    else:
+        drop_order_partitions(get_week_start(timezone.now().date()))
+
+    DishDailyTotal.objects.all().delete()
+
+
+def create_upcoming_order_partitions(
+    weeks_ahead: int = TaskSettingValues.ORDER_PARTITION_WEEKS_AHEAD,
+) -> list[str]:
+    """
+    Creates missing partitions of orders from the current week to `weeks_ahead`
+    weeks later
+    :param weeks_ahead: int
+    :return: list[str] names of the created partitions
+    """
+    week_start = get_week_start(timezone.now().date())
+
+    return create_order_partitions(
+        week_start + timedelta(weeks=week) for week in range(weeks_ahead + 1)
+    )
@@ -1,41 +1,165 @@
+from collections.abc import Iterator
+from datetime import date
+from smtplib import SMTPException
+from uuid import UUID
+
 import pandas as pd
 from celery import shared_task
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.core.mail import EmailMessage
 from django.db import transaction
 
-from .models import Menu, Order
+from apps.user.models import CustomUser
+
+from .catalog import publish_menu_artifact, save_menu
+from .exporters import Table, get_order_exporter, iterate_export_files
+from .models import Order
+from .reports import get_kitchen_summary
+from .storage import (
+    WeekdayOrder,
+    create_upcoming_order_partitions,
+    get_pending_orders_state,
+    get_pending_weekly_orders,
+    is_weekly_order_storage,
+    lock_pending_orders,
+    rebuild_dish_daily_totals,
+    remove_exported_orders,
+)
+from .utils import notify_accountant, notify_user
 from .values import (
+    KITCHEN_SUMMARY_TABLE_NAME,
     MENU_UPLOADED_CELERY_MESSAGE,
+    ORDER_PARTITIONS_CREATED_CELERY_MESSAGE,
+    ORDERS_EXPORT_REFRESHED_CELERY_MESSAGE,
     ORDERS_SENT_CELERY_MESSAGE,
-    OUTPUT_ORDERS_FILE_DIR,
+    ORDERS_TABLE_NAME,
+    OVERSUM_NOTIFIED_CELERY_MESSAGE,
+    CacheSettingValues,
+    ReportSettingValues,
+    TaskSettingValues,
     ViewSettingValues,
 )
 
+# SMTP failures are usually temporary, so email tasks are retried with a growing delay
+EMAIL_TASK_OPTIONS = dict(
+    autoretry_for=(SMTPException, OSError),
+    retry_backoff=True,
+    retry_backoff_max=TaskSettingValues.EMAIL_RETRY_BACKOFF_MAX,
+    retry_kwargs={"max_retries": TaskSettingValues.EMAIL_MAX_RETRIES},
+)
+
 
-def agrigate_orders() -> dict[str, list]:
+def get_export_tables() -> list[Table]:
     """
-    Returns all existing orders and remove them from the DB
-    :return: dict[str, list]
+    Returns tables of the orders export: the orders and dish quantities per day.
+    Orders are read while the tables are written, so removing them is up to
+    the caller, in the same transaction
+    :return: list[Table]
     """
-    agregated_orders = dict()
-    agregated_orders["names"] = list()
-
+    # Dish totals are only kept up to date by the forms, while orders can also
+    # be deleted or updated by admins, cascades and bulk updates
     with transaction.atomic():
-        for field_name in ViewSettingValues.ORDER_FORM_FIELDS:
-            agregated_orders[field_name] = Order.objects.values_list(
-                field_name, flat=True
-            )
+        lock_pending_orders()
+        rebuild_dish_daily_totals()
+        kitchen_summary = list(get_kitchen_summary())
+
+    return [
+        (
+            ORDERS_TABLE_NAME,
+            TaskSettingValues.ORDER_EXPORT_COLUMNS,
+            agrigate_orders(),
+        ),
+        (
+            KITCHEN_SUMMARY_TABLE_NAME,
+            ReportSettingValues.KITCHEN_SUMMARY_COLUMNS,
+            kitchen_summary,
+        ),
+    ]
+
+
+def agrigate_orders() -> Iterator[tuple]:
+    """
+    Yields orders waiting for export as rows of `ORDER_EXPORT_COLUMNS`. Orders
+    are read with their users in one ordered query through a server-side
+    cursor, so the query count doesn't depend on the number of orders
+    :return: Iterator[tuple]
+    """
+    if is_weekly_order_storage():
+        yield from agrigate_weekly_orders()
+        return
+
+    orders = Order.objects.select_related("user__userprofile").order_by(
+        "date", "user__userprofile__last_name", "user_id"
+    )
+
+    for order in orders.iterator(chunk_size=TaskSettingValues.EXPORT_CHUNK_SIZE):
+        yield get_order_export_row(order.user, order)
+
+
+def agrigate_weekly_orders() -> Iterator[tuple]:
+    """
+    Yields days of weekly orders that haven't been sent yet as rows of
+    `ORDER_EXPORT_COLUMNS`
+    :return: Iterator[tuple]
+    """
+    for user, day in get_pending_weekly_orders():
+        yield get_order_export_row(user, day)
 
-        for order in Order.objects.all():
-            agregated_orders["names"].append(
-                f"{order.user.userprofile.first_name} {order.user.userprofile.last_name}"
-            )
 
-        Order.objects.all().delete()
+def get_orders_fingerprint() -> str:
+    """
+    Returns a fingerprint of the orders waiting for export and the export format
+    :return: str
+    """
+    count, checksum = get_pending_orders_state()
+
+    return f"{settings.ORDERS_EXPORT_FORMAT}:{count}:{checksum}"
+
+
+def get_orders_export() -> list[tuple[str, bytes, str]]:
+    """
+    Returns (file name, content, mimetype) of every export file. Files are
+    cached with the fingerprint of the orders they were built from and are only
+    rebuilt once the orders change. The fingerprint is taken before the orders
+    are read, so orders saved meanwhile make the next call rebuild the files
+    :return: list[tuple[str, bytes, str]]
+    """
+    fingerprint = get_orders_fingerprint()
+    artifact = cache.get(CacheSettingValues.ORDERS_EXPORT_KEY)
+
+    if artifact and artifact["fingerprint"] == fingerprint:
+        return artifact["files"]
 
-    return agregated_orders
+    exporter = get_order_exporter(settings.ORDERS_EXPORT_FORMAT)
+    files = [
+        (file_name, file.read(), exporter.mimetype)
+        for file_name, file in iterate_export_files(exporter, get_export_tables())
+    ]
+    cache.set(
+        CacheSettingValues.ORDERS_EXPORT_KEY,
+        {"fingerprint": fingerprint, "files": files},
+        CacheSettingValues.ORDERS_EXPORT_TIMEOUT,
+    )
+
+    return files
+
+
+def get_order_export_row(user: CustomUser, order: Order | WeekdayOrder) -> tuple:
+    """
+    Returns a row of `ORDER_EXPORT_COLUMNS` for the user's order of a day
+    :param user: CustomUser
+    :param order: Order | WeekdayOrder
+    :return: tuple
+    """
+    return (
+        f"{user.userprofile.first_name} {user.userprofile.last_name}",
+        *(
+            getattr(order, field_name)
+            for field_name in ViewSettingValues.ORDER_FORM_FIELDS
+        ),
+    )
 
 
 @shared_task()
@@ -48,35 +172,42 @@ def upload_menu_task(uploaded_file: InMemoryUploadedFile) -> str:
     data_frame = pd.read_excel(uploaded_file)
 
     with transaction.atomic():
-        Menu.objects.all().delete()
-
-        created_objects = list()
-        for _, row in data_frame.iterrows():
-            new_menu = Menu(
-                first_course=row.get("first_course", ""),
-                first_course_price=row.get("first_course_price", None),
-                second_course=row.get("second_course", ""),
-                second_course_price=row.get("second_course_price", None),
-                dessert=row.get("dessert", ""),
-                dessert_price=row.get("dessert_price", None),
-                drink=row.get("drink", ""),
-                drink_price=row.get("drink_price", None),
-            )
-            created_objects.append(new_menu)
-
-        Menu.objects.bulk_create(created_objects)
+        save_menu(row for _, row in data_frame.iterrows())
+        transaction.on_commit(publish_menu_artifact)
 
     return MENU_UPLOADED_CELERY_MESSAGE
 
 
 @shared_task()
-def send_orders_task() -> str:
+def create_order_partitions_task() -> str:
     """
-    A scheduled task that sends all orders to catering company
+    A scheduled task that creates partitions of orders for the coming weeks
     :return: str
     """
-    pd.DataFrame(agrigate_orders()).to_excel(OUTPUT_ORDERS_FILE_DIR, index=False)
+    create_upcoming_order_partitions()
+
+    return ORDER_PARTITIONS_CREATED_CELERY_MESSAGE
 
+
+@shared_task()
+def refresh_orders_export_task() -> str:
+    """
+    A scheduled task that rebuilds the cached orders export if orders changed
+    since it was built, so the Friday export only has to send it
+    :return: str
+    """
+    get_orders_export()
+
+    return ORDERS_EXPORT_REFRESHED_CELERY_MESSAGE
+
+
+@shared_task()
+def send_orders_task() -> str:
+    """
+    A scheduled task that sends all orders to catering company. The cached
+    export is sent as is unless orders changed after the last refresh
+    :return: str
+    """
     email = EmailMessage(
         subject="Orders",
         body="Orders for current week:",
@@ -84,7 +215,68 @@ def send_orders_task() -> str:
         to=[settings.ORDERS_RECEIVER],
     )
 
-    email.attach_file(OUTPUT_ORDERS_FILE_DIR)
+    with transaction.atomic():
+        lock_pending_orders()
+        files = get_orders_export()
+        remove_exported_orders()
+        transaction.on_commit(
+            lambda: cache.delete(CacheSettingValues.ORDERS_EXPORT_KEY)
+        )
+
+    for file_name, content, mimetype in files:
+        email.attach(file_name, content, mimetype)
+
     email.send(fail_silently=False)
 
     return ORDERS_SENT_CELERY_MESSAGE
+
+
+@shared_task(**EMAIL_TASK_OPTIONS)
+def notify_user_task(user_id: str, order_date: str, oversum: int) -> str:
+    """
+    Notifies user about exceeding the max order amount
+    :param user_id: str
+    :param order_date: str in ISO format
+    :param oversum: int
+    :return: str
+    """
+    notify_user(
+        user=CustomUser.objects.select_related("userprofile").get(id=user_id),
+        order_date=date.fromisoformat(order_date),
+        oversum=oversum,
+    )
+
+    return OVERSUM_NOTIFIED_CELERY_MESSAGE
+
+
+@shared_task(**EMAIL_TASK_OPTIONS)
+def notify_accountant_task(user_id: str, oversum: int) -> str:
+    """
+    Notifies accountant about a user exceeding the max order amount
+    :param user_id: str
+    :param oversum: int
+    :return: str
+    """
+    notify_accountant(
+        user=CustomUser.objects.select_related("userprofile").get(id=user_id),
+        oversum=oversum,
+    )
+
+    return OVERSUM_NOTIFIED_CELERY_MESSAGE
+
+
+def enqueue_oversum_notifications(
+    user_id: UUID, order_date: date, oversum: int
+) -> None:
+    """
+    Schedules oversum notifications to be sent after the current transaction commits,
+    each email is a separate task, so a retry doesn't resend the other one
+    :param user_id: UUID
+    :param order_date: date
+    :param oversum: int
+    :return: None
+    """
+    transaction.on_commit(
+        lambda: notify_user_task.delay(str(user_id), order_date.isoformat(), oversum)
+    )
+    transaction.on_commit(lambda: notify_accountant_task.delay(str(user_id), oversum))
@@ -0,0 +1,194 @@
+import json
+import shutil
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.smakolyk.catalog import (
+    MenuCatalog,
+    bump_menu_version,
+    get_menu_catalog,
+    get_menu_version,
+    publish_menu_artifact,
+    save_menu,
+)
+from apps.smakolyk.models import Dish
+from apps.smakolyk.tasks import upload_menu_task
+
+from .values import MENU_ROW, TestValuesMethods
+
+
+class MenuCatalogTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.menu = MENU_ROW
+        save_menu([cls.menu])
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        Dish.objects.all().delete()
+
+    def test_build_uses_single_query(self):
+        """Test that the whole catalog is built with one query."""
+        with self.assertNumQueries(1):
+            catalog = MenuCatalog.build(get_menu_version())
+
+        self.assertEqual(catalog.dishes["first_course"], ("Soup",))
+        self.assertEqual(catalog.get_price("drink", "Water"), 2)
+        self.assertIsNone(catalog.get_price("drink", "Juice"))
+
+    def test_catalog_is_reused_within_version(self):
+        """Test that the catalog is read from the DB only once per version."""
+        catalog = get_menu_catalog()
+
+        with self.assertNumQueries(0):
+            self.assertIs(get_menu_catalog(), catalog)
+
+    def test_catalog_is_rebuilt_after_version_bump(self):
+        """Test that bumping the version invalidates the catalog."""
+        catalog = get_menu_catalog()
+        bump_menu_version()
+
+        self.assertIsNot(get_menu_catalog(), catalog)
+
+    def test_menu_versions_saved_one_at_a_time(self):
+        """Test that the next version is read under a lock held until commit."""
+        with CaptureQueriesContext(connection) as queries:
+            version = save_menu([MENU_ROW])
+
+        self.assertIn("pg_advisory_xact_lock", queries[1]["sql"])
+        self.assertEqual(save_menu([MENU_ROW]), version + 1)
+
+    def test_menu_change_bumps_version(self):
+        """Test that saving a menu row makes the new dish visible."""
+        version = get_menu_version()
+        save_menu(
+            [
+                {
+                    "first_course": "Borshch",
+                    "first_course_price": TestValuesMethods.get_price(),
+                    "second_course": "Pasta",
+                    "second_course_price": TestValuesMethods.get_price(),
+                    "dessert": "Cake",
+                    "dessert_price": TestValuesMethods.get_price(),
+                    "drink": "Tea",
+                    "drink_price": TestValuesMethods.get_price(),
+                }
+            ]
+        )
+
+        self.assertNotEqual(get_menu_version(), version)
+        self.assertIn("Borshch", get_menu_catalog().dishes["first_course"])
+
+    def test_get_chunks(self):
+        """Test that dishes are split into chunks of the given size."""
+        catalog = MenuCatalog(
+            version="test",
+            digest="test",
+            dishes={"first_course": ("a", "b", "c", "d")},
+            prices={"first_course": {}},
+            price_index={},
+            dish_ids={},
+        )
+
+        self.assertEqual(
+            catalog.get_chunks("first_course", 3), [("a", "b", "c"), ("d",)]
+        )
+
+
+class PublishMenuArtifactTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.menu = MENU_ROW
+        save_menu([cls.menu])
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root)
+        Dish.objects.all().delete()
+
+    def test_publish_writes_hashed_file_and_pointer(self):
+        """Test that the menu is published to a content-hashed file with a pointer."""
+        with override_settings(MEDIA_ROOT=self.media_root):
+            url = publish_menu_artifact()
+
+        directory = Path(self.media_root) / "menu"
+        pointer = json.loads((directory / "current.json").read_text())
+        artifact = json.loads((directory / Path(url).name).read_text())
+
+        self.assertEqual(pointer["url"], url)
+        self.assertIn(get_menu_catalog().digest, url)
+        self.assertEqual(artifact["prices"]["first_course"]["Soup"], 10)
+        self.assertEqual(artifact["carousel"]["drink"], [["Water"]])
+
+    def test_publish_removes_outdated_files(self):
+        """Test that only the current and the previous menu files are kept."""
+        with override_settings(MEDIA_ROOT=self.media_root):
+            first_url = publish_menu_artifact()
+            save_menu([{**self.menu, "drink_price": 3}])
+            second_url = publish_menu_artifact()
+            save_menu([{**self.menu, "drink_price": 4}])
+            third_url = publish_menu_artifact()
+
+        file_names = {
+            path.name for path in (Path(self.media_root) / "menu").glob("menu.*.json")
+        }
+
+        self.assertEqual(file_names, {Path(second_url).name, Path(third_url).name})
+        self.assertNotIn(Path(first_url).name, file_names)
+
+
+class UploadMenuTaskTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root)
+        Dish.objects.all().delete()
+
+    @staticmethod
+    def get_menu_file() -> SimpleUploadedFile:
+        """
+        Returns an Excel menu file with one row
+        :return: SimpleUploadedFile
+        """
+        buffer = BytesIO()
+        pd.DataFrame(
+            {
+                "first_course": ["Soup"],
+                "first_course_price": [10],
+                "second_course": ["Steak"],
+                "second_course_price": [15],
+                "dessert": ["Ice Cream"],
+                "dessert_price": [5],
+                "drink": ["Water"],
+                "drink_price": [2],
+            }
+        ).to_excel(buffer, index=False)
+
+        return SimpleUploadedFile("menu.xlsx", buffer.getvalue())
+
+    def test_upload_bumps_version_on_commit(self):
+        """Test that uploading a menu bumps the version once it's committed."""
+        get_menu_catalog()
+        version = get_menu_version()
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                upload_menu_task(self.get_menu_file())
+
+        self.assertEqual(len(callbacks), 2)
+        self.assertNotEqual(get_menu_version(), version)
+        self.assertEqual(get_menu_catalog().get_price("first_course", "Soup"), 10)
+        self.assertTrue((Path(self.media_root) / "menu" / "current.json").exists())
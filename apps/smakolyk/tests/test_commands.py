@@ -0,0 +1,119 @@
+import csv
+import tempfile
+from datetime import date
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils.text import slugify
+
+from apps.smakolyk.catalog import get_menu_version
+from apps.smakolyk.models import Dish, DishDailyTotal, History, Order, WeeklySpend
+from apps.smakolyk.storage import record_dish_daily_totals
+from apps.user.models import CustomUser, UserProfile
+
+from .values import TestValues
+
+
+class BenchmarkHomePageCommandTestCase(TestCase):
+    def test_benchmark_reports_both_render_times(self):
+        """Test that the benchmark prints render time with and without the cache."""
+        output = StringIO()
+
+        with self.assertNumQueries(0):
+            call_command("benchmark_home_page", iterations=2, dishes=4, stdout=output)
+
+        self.assertIn("Without fragment cache", output.getvalue())
+        self.assertIn("With fragment cache", output.getvalue())
+
+
+class ExplainQueriesCommandTestCase(TestCase):
+    def test_explain_reports_plans_and_rolls_back_data(self):
+        """Test that query plans are printed and the seeded data is removed."""
+        output = StringIO()
+        version = get_menu_version()
+
+        call_command("explain_queries", users=3, weeks=2, force=True, stdout=output)
+
+        self.assertIn("OrderView: next week is ordered", output.getvalue())
+        self.assertIn("Execution Time", output.getvalue())
+        # the history page is sought by the cursor of `get_history_after`
+        self.assertIn("(date <= ", output.getvalue())
+        self.assertFalse(WeeklySpend.objects.exists())
+        self.assertFalse(History.objects.exists())
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Dish.objects.exists())
+        self.assertEqual(get_menu_version(), version)
+
+    @override_settings(DEBUG=False)
+    def test_explain_refused_without_debug(self):
+        """Test that the command doesn't seed data unless it's forced."""
+        with self.assertRaises(CommandError):
+            call_command("explain_queries", users=3, weeks=2, stdout=StringIO())
+
+        self.assertFalse(Order.objects.exists())
+
+
+class ExportOrdersCommandTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email=TestValues.email, password=TestValues.password
+        )
+        UserProfile.objects.create(
+            user=cls.user,
+            username=TestValues.username,
+            first_name=TestValues.name,
+            last_name=TestValues.surname,
+            phone=TestValues.phone_number,
+            slug=slugify(TestValues.username),
+        )
+        order = Order.objects.create(
+            user=cls.user,
+            date=date(2024, 1, 1),
+            first_course="Soup",
+            first_course_quantity=2,
+        )
+        record_dish_daily_totals([order])
+
+    def tearDown(self):
+        Order.objects.all().delete()
+        UserProfile.objects.all().delete()
+        CustomUser.objects.all().delete()
+
+    def test_export_writes_a_file_per_table_and_keeps_orders(self):
+        """Test that CSV files are written and orders are kept by default."""
+        with tempfile.TemporaryDirectory() as output_dir:
+            call_command(
+                "export_orders",
+                "--format",
+                "csv",
+                "--output-dir",
+                output_dir,
+                stdout=StringIO(),
+            )
+
+            with open(Path(output_dir) / "summary.csv", newline="") as file:
+                summary = list(csv.reader(file))
+
+            self.assertTrue((Path(output_dir) / "orders.csv").exists())
+
+        self.assertEqual(summary[1], ["2024-01-01", "First course", "Soup", "2"])
+        self.assertTrue(Order.objects.exists())
+
+    def test_export_removes_orders_once_written(self):
+        """Test that orders and dish totals are removed after the export."""
+        with tempfile.TemporaryDirectory() as output_dir:
+            call_command(
+                "export_orders",
+                "--remove",
+                "--output-dir",
+                output_dir,
+                stdout=StringIO(),
+            )
+
+            self.assertTrue((Path(output_dir) / "orders.xlsx").exists())
+
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(DishDailyTotal.objects.exists())
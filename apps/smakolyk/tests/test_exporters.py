@@ -0,0 +1,61 @@
+from datetime import date
+from importlib.util import find_spec
+from io import BytesIO
+from unittest import skipUnless
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from apps.smakolyk.exporters import get_order_exporter, iterate_export_files
+from apps.smakolyk.values import TaskSettingValues
+
+ROWS = [
+    ("Taras Shevchenko", "Soup", 1, "Steak", 0, "Cake", 0, "Tea", 1, date(2024, 1, 1)),
+    ("Lesia Ukrainka", "Soup", 2, "Fish", 1, "Cake", 1, "Tea", 0, date(2024, 1, 2)),
+]
+
+
+class OrderExportersTestCase(SimpleTestCase):
+    def get_tables(self) -> list:
+        return [
+            ("Orders", TaskSettingValues.ORDER_EXPORT_COLUMNS, iter(ROWS)),
+            ("Summary", ("date", "dish"), [(date(2024, 1, 1), "Soup")]),
+        ]
+
+    def test_unknown_format_rejected(self):
+        """Test that a misconfigured export format is reported."""
+        with self.assertRaises(ImproperlyConfigured):
+            get_order_exporter("pdf")
+
+    def test_xlsx_tables_written_to_one_file(self):
+        """Test that formats with sheets get every table in one file."""
+        files = [
+            file_name
+            for file_name, _ in iterate_export_files(
+                get_order_exporter("xlsx"), self.get_tables()
+            )
+        ]
+
+        self.assertEqual(files, ["orders.xlsx"])
+
+    @skipUnless(find_spec("pyarrow"), "pyarrow isn't installed")
+    def test_parquet_tables_written_to_separate_files(self):
+        """Test that every table is written to its own Parquet file."""
+        import pyarrow.parquet as pq
+
+        tables = {
+            file_name: pq.read_table(BytesIO(file.read()))
+            for file_name, file in iterate_export_files(
+                get_order_exporter("parquet"), self.get_tables()
+            )
+        }
+
+        self.assertEqual(list(tables), ["orders.parquet", "summary.parquet"])
+        self.assertEqual(
+            tables["orders.parquet"].column_names,
+            list(TaskSettingValues.ORDER_EXPORT_COLUMNS),
+        )
+        self.assertEqual(
+            tables["orders.parquet"].column("date").to_pylist(),
+            [date(2024, 1, 1), date(2024, 1, 2)],
+        )
@@ -3,8 +3,9 @@ from unittest.mock import patch
 from django.test import TestCase
 from django.utils import timezone
 
+from apps.smakolyk.catalog import save_menu
 from apps.smakolyk.forms import OrderForm
-from apps.smakolyk.models import History, Menu, Order
+from apps.smakolyk.models import Dish, History, Order
 from apps.smakolyk.values import FormDefaultValues
 from apps.user.models import CustomUser
 
@@ -27,13 +28,13 @@ class OrderFormTestCase(TestCase):
             "drink": TestValuesMethods.get_dish_name(),
             "drink_price": TestValuesMethods.get_price(),
         }
-        Menu(**self.menu_data).save()
+        save_menu([self.menu_data])
 
     def tearDown(self):
-        Menu.objects.all().delete()
-        CustomUser.objects.all().delete()
         History.objects.all().delete()
         Order.objects.all().delete()
+        Dish.objects.all().delete()
+        CustomUser.objects.all().delete()
 
     @patch("apps.smakolyk.forms.get_menu_choices")
     def test_order_form_valid(self, mock_get_menu_choices):
@@ -64,6 +65,10 @@ class OrderFormTestCase(TestCase):
         self.assertEqual(Order.objects.count(), 1)
         self.assertEqual(History.objects.count(), 1)
 
+        history = History.objects.get()
+        self.assertEqual(history.first_course, self.menu_data["first_course"])
+        self.assertEqual(history.drink_price, self.menu_data["drink_price"])
+
     def test_empty_fields_defaults(self):
         """Test that empty fields default to the specified values."""
         form_data = {
@@ -125,6 +130,28 @@ class OrderFormTestCase(TestCase):
             [("Dish 1", "Dish 1"), ("Dish 2", "Dish 2")],
         )
 
+    @patch("apps.smakolyk.forms.get_menu_choices")
+    def test_menu_choices_injected(self, mock_get_menu_choices):
+        """Test that injected menu choices are used without building them per form."""
+        menu_choices = {
+            field_name: (("", "Select a dish"), (dish, dish))
+            for field_name, dish in (
+                ("first_course", self.menu_data["first_course"]),
+                ("second_course", self.menu_data["second_course"]),
+                ("dessert", self.menu_data["dessert"]),
+                ("drink", self.menu_data["drink"]),
+            )
+        }
+
+        with self.assertNumQueries(0):
+            form = OrderForm(initial={"user": self.user}, menu_choices=menu_choices)
+
+        mock_get_menu_choices.assert_not_called()
+        self.assertEqual(
+            form.fields["drink"].choices,
+            [("", "Select a dish"), (self.menu_data["drink"], self.menu_data["drink"])],
+        )
+
     def test_disabled_option_widget_render(self):
         """Test that the DisabledOptionWidget renders a disabled empty option."""
         form = OrderForm(initial={"user": self.user})
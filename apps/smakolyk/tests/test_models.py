@@ -1,12 +1,13 @@
-from datetime import date
+from datetime import date, timedelta
 
 from django.db import transaction
 from django.db.utils import IntegrityError
 from django.test import TestCase
 from django.utils.text import slugify
 
-from apps.smakolyk.models import History, Menu, Order
-from apps.smakolyk.values import ViewSettingValues
+from apps.smakolyk.catalog import save_menu
+from apps.smakolyk.models import CourseType, Dish, History, Order
+from apps.smakolyk.values import FormDefaultValues, ViewSettingValues
 from apps.user.models import CustomUser, UserProfile
 
 from .values import TestValues, TestValuesMethods
@@ -27,32 +28,33 @@ class OrderModelTest(TestCase):
             slug=slugify(TestValues.username),
         )
 
-        cls.menu = Menu.objects.create(
-            first_course=TestValuesMethods.get_dish_name(),
-            first_course_price=TestValuesMethods.get_price(),
-            second_course=TestValuesMethods.get_dish_name(),
-            second_course_price=TestValuesMethods.get_price(),
-            dessert=TestValuesMethods.get_dish_name(),
-            dessert_price=TestValuesMethods.get_price(),
-            drink=TestValuesMethods.get_dish_name(),
-            drink_price=TestValuesMethods.get_price(),
-        )
+        cls.menu = {
+            "first_course": TestValuesMethods.get_dish_name(),
+            "first_course_price": TestValuesMethods.get_price(),
+            "second_course": TestValuesMethods.get_dish_name(),
+            "second_course_price": TestValuesMethods.get_price(),
+            "dessert": TestValuesMethods.get_dish_name(),
+            "dessert_price": TestValuesMethods.get_price(),
+            "drink": TestValuesMethods.get_dish_name(),
+            "drink_price": TestValuesMethods.get_price(),
+        }
+        save_menu([cls.menu])
         cls.first_course_quantity = TestValuesMethods.get_quantity()
         cls.order = Order.objects.create(
             user=cls.user,
             date=date.today(),
-            first_course=cls.menu.first_course,
+            first_course=cls.menu["first_course"],
             first_course_quantity=cls.first_course_quantity,
-            second_course=cls.menu.second_course,
+            second_course=cls.menu["second_course"],
             second_course_quantity=TestValuesMethods.get_quantity(),
-            dessert=cls.menu.dessert,
+            dessert=cls.menu["dessert"],
             dessert_quantity=TestValuesMethods.get_quantity(),
-            drink=cls.menu.drink,
+            drink=cls.menu["drink"],
             drink_quantity=TestValuesMethods.get_quantity(),
         )
 
     def tearDown(self):
-        Menu.objects.all().delete()
+        Dish.objects.all().delete()
         Order.objects.all().delete()
         UserProfile.objects.all().delete()
         CustomUser.objects.all().delete()
@@ -62,7 +64,7 @@ class OrderModelTest(TestCase):
         order = Order.objects.get(id=self.order.id)
 
         self.assertEqual(order.user, self.user)
-        self.assertEqual(order.first_course, self.menu.first_course)
+        self.assertEqual(order.first_course, self.menu["first_course"])
         self.assertEqual(order.first_course_quantity, self.first_course_quantity)
 
     def test_order_string_representation(self):
@@ -77,63 +79,80 @@ class OrderModelTest(TestCase):
         """Test that order ForeignKey user relationship works"""
         self.assertEqual(self.order.user, self.user)
 
+    def test_order_unique_per_user_day(self):
+        """Test that a user can't have two orders for the same day"""
+        with transaction.atomic():
+            with self.assertRaises(IntegrityError):
+                Order.objects.create(user=self.user, date=self.order.date)
+
     def test_invalid_order_quantity(self):
         """Test that invalid order quantity raises validation error"""
         with transaction.atomic():
             with self.assertRaises(IntegrityError):
                 Order.objects.create(
                     user=self.user,
-                    date=date.today(),
-                    first_course=self.menu.first_course,
+                    date=date.today() + timedelta(days=1),
+                    first_course=self.menu["first_course"],
                     first_course_quantity=-1,  # Invalid quantity
-                    second_course=self.menu.second_course,
+                    second_course=self.menu["second_course"],
                     second_course_quantity=TestValuesMethods.get_quantity(),
-                    dessert=self.menu.dessert,
+                    dessert=self.menu["dessert"],
                     dessert_quantity=TestValuesMethods.get_quantity(),
-                    drink=self.menu.drink,
+                    drink=self.menu["drink"],
                     drink_quantity=TestValuesMethods.get_quantity(),
                 )
 
 
-class MenuModelTest(TestCase):
+class DishModelTest(TestCase):
     @classmethod
     def setUpTestData(cls):
-        cls.menu = Menu.objects.create(
-            first_course=TestValuesMethods.get_dish_name(),
-            first_course_price=TestValuesMethods.get_price(),
-            second_course=TestValuesMethods.get_dish_name(),
-            second_course_price=TestValuesMethods.get_price(),
-            dessert=TestValuesMethods.get_dish_name(),
-            dessert_price=TestValuesMethods.get_price(),
-            drink=TestValuesMethods.get_dish_name(),
-            drink_price=TestValuesMethods.get_price(),
-        )
+        cls.menu = {
+            "first_course": TestValuesMethods.get_dish_name(),
+            "first_course_price": TestValuesMethods.get_price(),
+            "second_course": TestValuesMethods.get_dish_name(),
+            "second_course_price": TestValuesMethods.get_price(),
+            "dessert": TestValuesMethods.get_dish_name(),
+            "dessert_price": TestValuesMethods.get_price(),
+            "drink": TestValuesMethods.get_dish_name(),
+            "drink_price": TestValuesMethods.get_price(),
+        }
+        cls.menu_version = save_menu([cls.menu])
 
     def tearDown(self):
-        Menu.objects.all().delete()
+        Dish.objects.all().delete()
 
-    def test_menu_creation(self):
-        """Test that the menu is created correctly"""
-        menu = Menu.objects.get(id=self.menu.id)
+    def test_dish_creation(self):
+        """Test that every course of an uploaded row is saved as a dish"""
+        dish = Dish.objects.get(
+            course_type=CourseType.FIRST_COURSE, name=self.menu["first_course"]
+        )
 
-        self.assertEqual(menu.first_course, self.menu.first_course)
-        self.assertEqual(menu.first_course_price, self.menu.first_course_price)
+        self.assertEqual(dish.price, self.menu["first_course_price"])
+        self.assertEqual(dish.menu_version, self.menu_version)
+        self.assertEqual(Dish.objects.count(), len(CourseType.values))
 
-    def test_menu_unique_fields(self):
-        """Test that unique constraint on menu fields is enforced"""
+    def test_dish_unique_in_menu_version(self):
+        """Test that unique constraint on dish name within a menu version is enforced"""
         with transaction.atomic():
             with self.assertRaises(IntegrityError):
-                Menu.objects.create(
-                    first_course=self.menu.first_course,
-                    first_course_price=TestValuesMethods.get_price(),
-                    second_course=TestValuesMethods.get_dish_name(),
-                    second_course_price=TestValuesMethods.get_price(),
-                    dessert=TestValuesMethods.get_dish_name(),
-                    dessert_price=TestValuesMethods.get_price(),
-                    drink=TestValuesMethods.get_dish_name(),
-                    drink_price=TestValuesMethods.get_price(),
+                Dish.objects.create(
+                    course_type=CourseType.FIRST_COURSE,
+                    name=self.menu["first_course"],
+                    price=TestValuesMethods.get_price(),
+                    position=1,
+                    menu_version=self.menu_version,
                 )
 
+    def test_current_dishes(self):
+        """Test that only dishes of the latest menu version are current"""
+        new_menu_version = save_menu([self.menu])
+
+        self.assertEqual(new_menu_version, self.menu_version + 1)
+        self.assertEqual(
+            set(Dish.objects.current().values_list("menu_version", flat=True)),
+            {new_menu_version},
+        )
+
 
 class HistoryModelTest(TestCase):
     @classmethod
@@ -150,26 +169,36 @@ class HistoryModelTest(TestCase):
             slug=slugify(TestValues.username),
         )
 
+        save_menu(
+            [
+                {
+                    "first_course": TestValuesMethods.get_dish_name(),
+                    "first_course_price": TestValuesMethods.get_price(),
+                    "second_course": TestValuesMethods.get_dish_name(),
+                    "second_course_price": TestValuesMethods.get_price(),
+                    "dessert": TestValuesMethods.get_dish_name(),
+                    "dessert_price": TestValuesMethods.get_price(),
+                    "drink": TestValuesMethods.get_dish_name(),
+                    "drink_price": TestValuesMethods.get_price(),
+                }
+            ]
+        )
+        cls.first_course = Dish.objects.get(course_type=CourseType.FIRST_COURSE)
+        cls.drink = Dish.objects.get(course_type=CourseType.DRINK)
+
         cls.history = History.objects.create(
             user=cls.user,
             date=date.today(),
             total_amount=ViewSettingValues.MAX_ORDER_AMOUNT,
-            first_course=TestValuesMethods.get_dish_name(),
+            first_course_dish=cls.first_course,
             first_course_quantity=TestValuesMethods.get_quantity(),
-            first_course_price=TestValuesMethods.get_price(),
-            second_course=TestValuesMethods.get_dish_name(),
-            second_course_quantity=TestValuesMethods.get_quantity(),
-            second_course_price=TestValuesMethods.get_price(),
-            dessert=TestValuesMethods.get_dish_name(),
-            dessert_quantity=TestValuesMethods.get_quantity(),
-            dessert_price=TestValuesMethods.get_price(),
-            drink=TestValuesMethods.get_dish_name(),
+            drink_dish=cls.drink,
             drink_quantity=TestValuesMethods.get_quantity(),
-            drink_price=TestValuesMethods.get_price(),
         )
 
     def tearDown(self):
-        Menu.objects.all().delete()
+        History.objects.all().delete()
+        Dish.objects.all().delete()
         UserProfile.objects.all().delete()
         CustomUser.objects.all().delete()
 
@@ -178,7 +207,29 @@ class HistoryModelTest(TestCase):
         history = History.objects.filter(id=self.history.id).first()
 
         self.assertEqual(history.total_amount, self.history.total_amount)
-        self.assertEqual(history.first_course, self.history.first_course)
+        self.assertEqual(history.first_course, self.first_course.name)
+        self.assertEqual(history.first_course_price, self.first_course.price)
+        self.assertEqual(history.drink_price, self.drink.price)
+
+    def test_history_dish_not_chosen(self):
+        """Test that a dish that wasn't ordered is shown with default values"""
+        history = History.objects.filter(id=self.history.id).first()
+
+        self.assertEqual(
+            history.dessert, FormDefaultValues.DISH_NOT_CHOSEN_DEFAULT_VALUE
+        )
+        self.assertEqual(
+            history.dessert_price,
+            FormDefaultValues.DISH_QUANTIRY_NOT_CHOSEN_DEFAULT_VALUE,
+        )
+
+    def test_history_with_dishes_uses_single_query(self):
+        """Test that dishes of a history row are read with the row itself"""
+        with self.assertNumQueries(1):
+            history = History.objects.with_dishes().get(id=self.history.id)
+
+            self.assertEqual(history.first_course, self.first_course.name)
+            self.assertEqual(history.drink, self.drink.name)
 
     def test_history_ordering(self):
         """Test history ordering by date"""
@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.smakolyk.models import Order
+from apps.smakolyk.partitions import (
+    create_order_partitions,
+    drop_order_partitions,
+    get_order_partition_name,
+    get_order_partitions,
+    get_unpartitioned_weeks,
+)
+from apps.smakolyk.storage import get_week_start
+from apps.user.models import CustomUser
+
+from .values import TestValues
+
+
+class OrderPartitionsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email=TestValues.email, password=TestValues.password
+        )
+        cls.week_start = get_week_start(date.today())
+
+    def tearDown(self):
+        Order.objects.all().delete()
+        CustomUser.objects.all().delete()
+
+    def create_order(self, date_: date) -> Order:
+        return Order.objects.create(
+            user=self.user, date=date_, first_course="Soup", first_course_quantity=1
+        )
+
+    def test_partition_created_with_orders_of_its_week(self):
+        """Test that orders kept in the default partition move to their week."""
+        self.create_order(date(2024, 1, 3))
+
+        created = create_order_partitions([self.week_start])
+
+        self.assertEqual(
+            created,
+            [
+                "smakolyk_order_2024_w01",
+                get_order_partition_name(self.week_start),
+            ],
+        )
+        self.assertEqual(
+            get_order_partitions(),
+            {
+                "smakolyk_order_2024_w01": date(2024, 1, 1),
+                get_order_partition_name(self.week_start): self.week_start,
+            },
+        )
+        self.assertEqual(get_unpartitioned_weeks(), [])
+        self.assertEqual(create_order_partitions([self.week_start]), [])
+        self.assertEqual(Order.objects.get().date, date(2024, 1, 3))
+
+    def test_orders_dropped_with_their_partitions(self):
+        """Test that filled and past partitions are dropped with all orders."""
+        next_week_start = self.week_start + timedelta(weeks=1)
+        create_order_partitions(
+            [self.week_start - timedelta(weeks=1), self.week_start, next_week_start]
+        )
+        self.create_order(next_week_start)
+        self.create_order(next_week_start + timedelta(weeks=4))
+
+        dropped = drop_order_partitions(self.week_start)
+
+        self.assertEqual(
+            sorted(dropped),
+            [
+                get_order_partition_name(self.week_start - timedelta(weeks=1)),
+                get_order_partition_name(next_week_start),
+            ],
+        )
+        self.assertEqual(list(get_order_partitions().values()), [self.week_start])
+        self.assertFalse(Order.objects.exists())
+
+    def test_command_creates_partitions_of_coming_weeks(self):
+        """Test that the command creates the current and coming weeks once."""
+        call_command("order_partitions", weeks_ahead=2, stdout=StringIO())
+
+        self.assertEqual(
+            sorted(get_order_partitions().values()),
+            [self.week_start + timedelta(weeks=week) for week in range(3)],
+        )
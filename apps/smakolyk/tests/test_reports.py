@@ -0,0 +1,184 @@
+import csv
+from datetime import date
+from io import BytesIO, StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.text import slugify
+from openpyxl import load_workbook
+
+from apps.smakolyk.models import DishDailyTotal, History, Order
+from apps.smakolyk.reports import get_kitchen_summary
+from apps.smakolyk.storage import record_dish_daily_totals
+from apps.smakolyk.values import ReportSettingValues
+from apps.user.models import CustomUser, UserProfile
+
+from .values import TestValues
+
+
+class DeductionReportTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email=TestValues.email, password=TestValues.password
+        )
+        UserProfile.objects.create(
+            user=cls.user,
+            username=TestValues.username,
+            first_name=TestValues.name,
+            last_name=TestValues.surname,
+            phone=TestValues.phone_number,
+            slug=slugify(TestValues.username),
+        )
+        History.objects.bulk_create(
+            History(user=cls.user, date=date_, total_amount=total_amount)
+            for date_, total_amount in (
+                (date(2024, 1, 8), 250),
+                (date(2024, 1, 9), 210),
+                (date(2024, 1, 10), 100),
+                (date(2024, 2, 5), 150),
+                (date(2024, 3, 4), 230),
+            )
+        )
+
+    def tearDown(self):
+        History.objects.all().delete()
+        UserProfile.objects.all().delete()
+        CustomUser.objects.all().delete()
+
+    def get_expected_rows(self) -> list[list[str]]:
+        return [
+            list(ReportSettingValues.DEDUCTION_REPORT_COLUMNS),
+            [
+                "2024-01",
+                self.user.email,
+                TestValues.name,
+                TestValues.surname,
+                "3",
+                "560",
+                "60",
+            ],
+            [
+                "2024-03",
+                self.user.email,
+                TestValues.name,
+                TestValues.surname,
+                "1",
+                "230",
+                "30",
+            ],
+        ]
+
+    def test_deduction_report_command_csv(self):
+        """Test that months without deductions are left out of the report."""
+        output = StringIO()
+
+        call_command("deduction_report", stdout=output)
+
+        self.assertEqual(
+            list(csv.reader(StringIO(output.getvalue()))), self.get_expected_rows()
+        )
+
+    def test_deduction_report_command_date_range(self):
+        """Test that the report only covers history in the date range."""
+        output = StringIO()
+
+        call_command(
+            "deduction_report",
+            "--from",
+            "2024-02-01",
+            "--to",
+            "2024-12-31",
+            stdout=output,
+        )
+
+        self.assertEqual(
+            list(csv.reader(StringIO(output.getvalue()))),
+            [self.get_expected_rows()[0], self.get_expected_rows()[2]],
+        )
+
+    def test_deduction_report_admin_download(self):
+        """Test that the admin streams the report in both formats."""
+        admin = CustomUser.objects.create_superuser(
+            email=f"admin.{TestValues.email}", password=TestValues.password
+        )
+        client = Client()
+        client.force_login(admin)
+        url = reverse("admin:smakolyk_history_deduction_report")
+
+        csv_response = client.get(url, {"format": "csv"})
+        xlsx_response = client.get(url, {"format": "xlsx"})
+
+        self.assertTrue(csv_response.streaming)
+        self.assertEqual(
+            list(
+                csv.reader(StringIO(b"".join(csv_response.streaming_content).decode()))
+            ),
+            self.get_expected_rows(),
+        )
+        worksheet = load_workbook(
+            BytesIO(b"".join(xlsx_response.streaming_content))
+        ).active
+        self.assertEqual(
+            [list(map(str, row)) for row in worksheet.iter_rows(values_only=True)],
+            self.get_expected_rows(),
+        )
+        self.assertEqual(client.get(url, {"format": "pdf"}).status_code, 400)
+
+
+class KitchenSummaryTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            CustomUser.objects.create_user(
+                email=f"{number}.{TestValues.email}", password=TestValues.password
+            )
+            for number in range(2)
+        ]
+
+    def tearDown(self):
+        DishDailyTotal.objects.all().delete()
+        Order.objects.all().delete()
+        CustomUser.objects.all().delete()
+
+    def test_kitchen_summary_read_from_running_totals(self):
+        """Test that quantities of every save are added to the dish totals."""
+        orders = Order.objects.bulk_create(
+            [
+                Order(
+                    user=self.users[0],
+                    date=date(2024, 1, 1),
+                    first_course="Soup",
+                    first_course_quantity=2,
+                    drink="Water",
+                    drink_quantity=1,
+                ),
+                Order(
+                    user=self.users[1],
+                    date=date(2024, 1, 1),
+                    first_course="Soup",
+                    first_course_quantity=1,
+                ),
+                Order(
+                    user=self.users[1],
+                    date=date(2024, 1, 2),
+                    dessert="Cake",
+                    dessert_quantity=3,
+                ),
+            ]
+        )
+        record_dish_daily_totals(orders)
+        record_dish_daily_totals(orders[1:2])
+
+        with self.assertNumQueries(1):
+            summary = list(get_kitchen_summary())
+
+        self.assertEqual(
+            summary,
+            [
+                (date(2024, 1, 1), "Drink", "Water", 1),
+                (date(2024, 1, 1), "First course", "Soup", 4),
+                (date(2024, 1, 2), "Dessert", "Cake", 3),
+            ],
+        )
@@ -0,0 +1,241 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils.text import slugify
+
+from apps.smakolyk.catalog import save_menu
+from apps.smakolyk.models import Dish, History, Order, WeeklyOrder, WeeklySpend
+from apps.smakolyk.reports import get_kitchen_summary
+from apps.smakolyk.storage import (
+    get_history_page,
+    get_week_history,
+    get_week_start,
+    lock_pending_orders,
+    rebuild_dish_daily_totals,
+    record_weekly_spend,
+    remove_exported_orders,
+    user_has_orders,
+)
+from apps.smakolyk.tasks import agrigate_orders
+from apps.smakolyk.utils import get_current_week_dates
+from apps.smakolyk.values import TaskSettingValues, ViewSettingValues
+from apps.user.models import CustomUser, UserProfile
+
+from .values import MENU_ROW, TestValues
+
+
+@override_settings(WEEKLY_ORDER_STORAGE=True)
+class WeeklyOrderStorageTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email=TestValues.email, password=TestValues.password
+        )
+        UserProfile.objects.create(
+            user=cls.user,
+            username=TestValues.username,
+            first_name=TestValues.name,
+            last_name=TestValues.surname,
+            phone=TestValues.phone_number,
+            slug=slugify(TestValues.username),
+        )
+        save_menu([MENU_ROW])
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.week_dates = get_current_week_dates()
+
+    def tearDown(self):
+        WeeklyOrder.objects.all().delete()
+        Dish.objects.all().delete()
+        UserProfile.objects.all().delete()
+        CustomUser.objects.all().delete()
+
+    def post_week_order(self, dates: list = None):
+        """
+        Submits the order formset with Soup for every day and Water for Monday
+        """
+        data = {
+            "form-TOTAL_FORMS": ViewSettingValues.FORMS_NUMBER,
+            "form-INITIAL_FORMS": 0,
+            "form-0-drink": "Water",
+            "form-0-drink_quantity": 2,
+        }
+
+        for idx, date_ in enumerate(dates or self.week_dates):
+            data.update(
+                {
+                    f"form-{idx}-first_course": "Soup",
+                    f"form-{idx}-first_course_quantity": 1,
+                    f"form-{idx}-date": date_.isoformat(),
+                }
+            )
+
+        return self.client.post(reverse("smakolyk:order"), data)
+
+    def test_week_saved_as_one_row(self):
+        """Test that the whole week is saved as one row instead of ten."""
+        self.post_week_order()
+
+        weekly_order = WeeklyOrder.objects.get()
+
+        self.assertEqual(weekly_order.week_start, get_week_start(self.week_dates[0]))
+        self.assertEqual(len(weekly_order.days), ViewSettingValues.FORMS_NUMBER)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(History.objects.exists())
+
+    def test_week_order_rejected_when_already_ordered(self):
+        """Test that a second submission of the same week is rejected."""
+        self.post_week_order()
+
+        response = self.post_week_order()
+
+        self.assertRedirects(
+            response, reverse("smakolyk:order_error"), fetch_redirect_response=False
+        )
+        self.assertEqual(WeeklyOrder.objects.count(), 1)
+
+    def test_week_order_with_repeated_day_rejected(self):
+        """Test that a week with the same day ordered twice isn't saved."""
+        self.post_week_order([self.week_dates[0]] * ViewSettingValues.FORMS_NUMBER)
+
+        self.assertFalse(WeeklyOrder.objects.exists())
+
+    def test_history_read_from_weekly_order(self):
+        """Test that history of a weekly order has the fields of a History row."""
+        self.post_week_order()
+
+        with self.assertNumQueries(2):
+            monday, tuesday = get_week_history(self.user.id, self.week_dates[:2])
+
+        self.assertEqual(monday.date, self.week_dates[0])
+        self.assertEqual(monday.first_course, "Soup")
+        self.assertEqual(monday.drink_price, 2)
+        self.assertEqual(monday.total_amount, 14)
+        self.assertEqual(tuesday.drink, "Not chosen")
+        self.assertEqual(tuesday.total_amount, 10)
+
+    def test_history_ajax_view(self):
+        """Test that the history endpoint reads weekly orders."""
+        self.post_week_order()
+
+        response = self.client.get(
+            reverse("smakolyk:get_history_week"),
+            {"date": self.week_dates[0].isoformat()},
+        )
+
+        self.assertTrue(response.json()["date_exists"])
+        self.assertEqual(
+            response.json()["history_data"]["monday"]["first_course_price"], 10
+        )
+
+    def test_export_marks_weekly_orders_exported(self):
+        """Test that every day is exported once and the week is kept as history."""
+        self.post_week_order()
+
+        with transaction.atomic():
+            exported = dict(
+                zip(TaskSettingValues.ORDER_EXPORT_COLUMNS, zip(*agrigate_orders()))
+            )
+            remove_exported_orders()
+
+        self.assertEqual(list(exported["date"]), self.week_dates)
+        self.assertEqual(list(exported["first_course"]), ["Soup"] * 5)
+        self.assertEqual(list(exported["drink_quantity"]), [2, 0, 0, 0, 0])
+        self.assertEqual(
+            list(exported["names"]), [f"{TestValues.name} {TestValues.surname}"] * 5
+        )
+        self.assertEqual(list(agrigate_orders()), [])
+        self.assertTrue(WeeklyOrder.objects.exists())
+
+    def test_dish_totals_rebuilt_from_weekly_orders(self):
+        """Test that totals are counted in one query and emptied days dropped."""
+        self.post_week_order()
+        summary = list(get_kitchen_summary())
+
+        with transaction.atomic():
+            lock_pending_orders()
+
+            # delete and insert
+            with self.assertNumQueries(2):
+                rebuild_dish_daily_totals()
+
+        self.assertEqual(list(get_kitchen_summary()), summary)
+        self.assertEqual(len(summary), 6)
+
+        WeeklyOrder.objects.update(days={})
+
+        with transaction.atomic():
+            lock_pending_orders()
+            rebuild_dish_daily_totals()
+
+        self.assertFalse(get_kitchen_summary().exists())
+
+    def test_history_page_read_from_weekly_orders(self):
+        """Test that history pages are split into days of weekly orders."""
+        self.post_week_order()
+
+        rows, cursor = get_history_page(self.user.id, None, 3)
+        next_rows, next_cursor = get_history_page(self.user.id, cursor, 3)
+
+        self.assertEqual([row.date for row in rows + next_rows], self.week_dates[::-1])
+        self.assertIsNone(next_cursor)
+
+
+class WeeklySpendTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email=TestValues.email, password=TestValues.password
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        WeeklySpend.objects.all().delete()
+        CustomUser.objects.all().delete()
+
+    def test_weekly_spend_accumulated_per_iso_week(self):
+        """Test that days are added to the row of their ISO week."""
+        # 2024-12-30 is Monday of the first ISO week of 2025
+        record_weekly_spend(
+            self.user.id, [date(2024, 12, 27), date(2024, 12, 30)], [250, 20]
+        )
+        record_weekly_spend(self.user.id, [date(2025, 1, 3)], [210])
+
+        self.assertEqual(
+            list(
+                WeeklySpend.objects.order_by("iso_week").values_list(
+                    "iso_week", "total", "oversum", "days_ordered"
+                )
+            ),
+            [("2024-W52", 250, 50, 1), ("2025-W01", 230, 10, 2)],
+        )
+
+    def test_weekly_spend_subtracted_on_history_delete(self):
+        """Test that deleted days are subtracted and emptied weeks removed."""
+        dates, total_amounts = [date(2025, 1, 1), date(2025, 1, 2)], [250, 20]
+        History.objects.bulk_create(
+            History(user=self.user, date=date_, total_amount=total_amount)
+            for date_, total_amount in zip(dates, total_amounts)
+        )
+        record_weekly_spend(self.user.id, dates, total_amounts)
+
+        History.objects.get(date=dates[0]).delete()
+
+        self.assertEqual(
+            list(WeeklySpend.objects.values_list("total", "oversum", "days_ordered")),
+            [(20, 0, 1)],
+        )
+        self.assertTrue(user_has_orders(self.user.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            History.objects.get(date=dates[1]).delete()
+
+        self.assertFalse(WeeklySpend.objects.exists())
+        self.assertFalse(user_has_orders(self.user.id))
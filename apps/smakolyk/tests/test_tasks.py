@@ -0,0 +1,264 @@
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from smtplib import SMTPException
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.text import slugify
+from openpyxl import load_workbook
+
+from apps.smakolyk.models import DishDailyTotal, Order
+from apps.smakolyk.reports import get_kitchen_summary
+from apps.smakolyk.storage import lock_pending_orders, record_dish_daily_totals
+from apps.smakolyk.tasks import (
+    agrigate_orders,
+    enqueue_oversum_notifications,
+    notify_accountant_task,
+    notify_user_task,
+    refresh_orders_export_task,
+    send_orders_task,
+)
+from apps.smakolyk.values import (
+    ORDERS_EXPORT_LOCK_ID,
+    OVERSUM_NOTIFIED_CELERY_MESSAGE,
+    CacheSettingValues,
+    ReportSettingValues,
+    TaskSettingValues,
+)
+from apps.user.models import CustomUser, UserProfile
+
+from .values import TestValues
+
+
+class OversumNotificationTasksTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email=TestValues.email, password=TestValues.password
+        )
+        UserProfile.objects.create(
+            user=cls.user,
+            username=TestValues.username,
+            first_name=TestValues.name,
+            last_name=TestValues.surname,
+            phone=TestValues.phone_number,
+            slug=slugify(TestValues.username),
+        )
+
+    def tearDown(self):
+        UserProfile.objects.all().delete()
+        CustomUser.objects.all().delete()
+
+    @patch("apps.smakolyk.utils.send_mail")
+    def test_notify_user_task(self, mock_send_mail):
+        """Test that the task sends an email to the user."""
+        result = notify_user_task.apply(
+            args=[str(self.user.id), date.today().isoformat(), 10]
+        )
+
+        self.assertEqual(result.get(), OVERSUM_NOTIFIED_CELERY_MESSAGE)
+        self.assertEqual(mock_send_mail.call_args.kwargs["recipient_list"], [self.user])
+
+    @patch("apps.smakolyk.utils.send_mail")
+    def test_notify_accountant_task_retries(self, mock_send_mail):
+        """Test that the task is retried when the SMTP server fails."""
+        mock_send_mail.side_effect = [SMTPException("Unavailable"), 1]
+
+        result = notify_accountant_task.apply(args=[str(self.user.id), 10])
+
+        self.assertEqual(result.get(), OVERSUM_NOTIFIED_CELERY_MESSAGE)
+        self.assertEqual(mock_send_mail.call_count, 2)
+
+    @patch.object(notify_accountant_task, "delay")
+    @patch.object(notify_user_task, "delay")
+    def test_notifications_enqueued_on_commit(
+        self, mock_user_delay, mock_accountant_delay
+    ):
+        """Test that notifications are enqueued only after the transaction commits."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            enqueue_oversum_notifications(self.user.id, date(2024, 1, 1), 10)
+
+        mock_user_delay.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+
+        mock_user_delay.assert_called_once_with(str(self.user.id), "2024-01-01", 10)
+        mock_accountant_delay.assert_called_once_with(str(self.user.id), 10)
+
+
+class AgrigateOrdersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number, (surname, phone) in enumerate(
+            (
+                ("Shevchenko", TestValues.valid_phonenumber1),
+                ("Bondar", TestValues.valid_phonenumber2),
+            )
+        ):
+            user = CustomUser.objects.create_user(
+                email=f"{number}.{TestValues.email}", password=TestValues.password
+            )
+            UserProfile.objects.create(
+                user=user,
+                username=f"{TestValues.username}{number}",
+                first_name=TestValues.name,
+                last_name=surname,
+                phone=phone,
+                slug=slugify(f"{TestValues.username}{number}"),
+            )
+            record_dish_daily_totals(
+                Order.objects.bulk_create(
+                    Order(
+                        user=user,
+                        date=date(2024, 1, 1) + timedelta(days=day),
+                        first_course="Soup",
+                        first_course_quantity=day + 1,
+                    )
+                    for day in range(5)
+                )
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        DishDailyTotal.objects.all().delete()
+        Order.objects.all().delete()
+        UserProfile.objects.all().delete()
+        CustomUser.objects.all().delete()
+
+    def test_orders_exported_in_one_query(self):
+        """Test that orders are read with their users in one query."""
+        with self.assertNumQueries(1):
+            rows = list(agrigate_orders())
+
+        self.assertEqual(
+            [(row[0], row[-1]) for row in rows[:3]],
+            [
+                (f"{TestValues.name} Bondar", date(2024, 1, 1)),
+                (f"{TestValues.name} Shevchenko", date(2024, 1, 1)),
+                (f"{TestValues.name} Bondar", date(2024, 1, 2)),
+            ],
+        )
+        self.assertEqual(rows[0][1:3], ("Soup", 1))
+        self.assertEqual(Order.objects.count(), 10)
+
+    @override_settings(ORDERS_RECEIVER="catering@example.com")
+    def test_orders_kept_when_export_is_interrupted(self):
+        """Test that orders aren't removed unless all of them were exported."""
+        with patch("apps.smakolyk.tasks.iterate_export_files", side_effect=OSError):
+            result = send_orders_task.apply()
+
+        self.assertTrue(result.failed())
+        self.assertEqual(Order.objects.count(), 10)
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(
+        ORDERS_RECEIVER="catering@example.com", ORDERS_EXPORT_FORMAT="csv"
+    )
+    def test_orders_sent_in_configured_format(self):
+        """Test that single table formats get one attachment per table."""
+        send_orders_task.apply().get()
+
+        attachments = mail.outbox[0].attachments
+
+        self.assertEqual(
+            [(file_name, mimetype) for file_name, _, mimetype in attachments],
+            [("orders.csv", "text/csv"), ("summary.csv", "text/csv")],
+        )
+        self.assertEqual(len(attachments[0][1].splitlines()), 11)
+
+    @override_settings(ORDERS_RECEIVER="catering@example.com")
+    def test_orders_sent_as_xlsx_attachment(self):
+        """Test that orders are attached as a workbook built in memory."""
+        send_orders_task.apply().get()
+
+        file_name, content, _ = mail.outbox[0].attachments[0]
+        workbook = load_workbook(BytesIO(content))
+        rows = list(workbook["Orders"].iter_rows(values_only=True))
+
+        self.assertEqual(file_name, "orders.xlsx")
+        self.assertEqual(rows[0], TaskSettingValues.ORDER_EXPORT_COLUMNS)
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(
+            list(workbook["Summary"].iter_rows(values_only=True))[:3],
+            [
+                ReportSettingValues.KITCHEN_SUMMARY_COLUMNS,
+                (datetime(2024, 1, 1), "First course", "Soup", 2),
+                (datetime(2024, 1, 2), "First course", "Soup", 4),
+            ],
+        )
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(DishDailyTotal.objects.exists())
+
+    def test_refresh_reuses_export_while_orders_are_unchanged(self):
+        """Test that the export is only rebuilt once the orders change."""
+        refresh_orders_export_task.apply().get()
+
+        # the fingerprint and the cached files
+        with self.assertNumQueries(1):
+            refresh_orders_export_task.apply().get()
+
+        Order.objects.create(
+            user=CustomUser.objects.first(),
+            date=date(2024, 1, 8),
+            first_course="Soup",
+            first_course_quantity=1,
+        )
+        refresh_orders_export_task.apply().get()
+
+        _, content, _ = cache.get(CacheSettingValues.ORDERS_EXPORT_KEY)["files"][0]
+        rows = list(load_workbook(BytesIO(content))["Orders"].iter_rows())
+
+        self.assertEqual(len(rows), 12)
+
+    def test_refresh_drops_totals_of_removed_orders(self):
+        """Test that deleted and bulk updated orders are left out of the summary."""
+        refresh_orders_export_task.apply().get()
+
+        Order.objects.filter(date=date(2024, 1, 1)).delete()
+        Order.objects.filter(date=date(2024, 1, 2)).update(first_course_quantity=1)
+        refresh_orders_export_task.apply().get()
+
+        self.assertEqual(
+            list(get_kitchen_summary())[:2],
+            [
+                (date(2024, 1, 2), "First course", "Soup", 2),
+                (date(2024, 1, 3), "First course", "Soup", 6),
+            ],
+        )
+        _, content, _ = cache.get(CacheSettingValues.ORDERS_EXPORT_KEY)["files"][0]
+        summary = list(load_workbook(BytesIO(content))["Summary"].iter_rows())
+
+        self.assertEqual(len(summary), 5)
+
+    def test_exports_take_turns(self):
+        """Test that exports wait for each other before locking the orders."""
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            lock_pending_orders()
+
+        self.assertEqual(
+            [query["sql"] for query in queries],
+            [
+                f"SELECT pg_advisory_xact_lock({ORDERS_EXPORT_LOCK_ID})",
+                "LOCK TABLE smakolyk_order IN SHARE MODE",
+            ],
+        )
+
+    @override_settings(ORDERS_RECEIVER="catering@example.com")
+    def test_orders_sent_from_refreshed_export(self):
+        """Test that the Friday task sends the export built in advance."""
+        refresh_orders_export_task.apply().get()
+        files = cache.get(CacheSettingValues.ORDERS_EXPORT_KEY)["files"]
+
+        with patch("apps.smakolyk.tasks.get_export_tables") as mock_get_export_tables:
+            send_orders_task.apply().get()
+
+        mock_get_export_tables.assert_not_called()
+        self.assertEqual(mail.outbox[0].attachments, files)
+        self.assertFalse(Order.objects.exists())
@@ -7,7 +7,8 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 from django.utils.text import slugify
 
-from apps.smakolyk.models import Menu, Order
+from apps.smakolyk.catalog import get_menu_catalog, save_menu
+from apps.smakolyk.models import Dish, Order
 from apps.smakolyk.utils import (
     get_current_week_dates,
     get_dates_dict,
@@ -23,10 +24,15 @@ from apps.smakolyk.utils import (
     validate_file_extension,
     validate_file_size,
 )
-from apps.smakolyk.values import DataMappingValues, ValidationValues, ViewSettingValues
+from apps.smakolyk.values import (
+    DataMappingValues,
+    FormDefaultValues,
+    ValidationValues,
+    ViewSettingValues,
+)
 from apps.user.models import CustomUser, UserProfile
 
-from .values import TestValues, TestValuesMethods
+from .values import MENU_ROW, TestValues, TestValuesMethods
 
 
 class NotificationTest(TestCase):
@@ -85,7 +91,7 @@ class CalculationTestCase(TestCase):
         )
 
     def tearDown(self):
-        Menu.objects.all().delete()
+        Dish.objects.all().delete()
         CustomUser.objects.all().delete()
 
     def test_get_order_total(self):
@@ -120,31 +126,13 @@ class CalculationTestCase(TestCase):
 
     def test_get_dish_price(self):
         """Test get_dish_price to ensure it returns the correct price for a dish."""
-        Menu.objects.create(
-            first_course="Soup",
-            first_course_price=10,
-            second_course="Steak",
-            second_course_price=15,
-            dessert="Ice Cream",
-            dessert_price=5,
-            drink="Water",
-            drink_price=2,
-        )
+        save_menu([MENU_ROW])
         price = get_dish_price(dish_value="Soup", dish_type="first_course")
         self.assertEqual(price, 10)
 
     def test_get_order_data(self):
         """Test get_order_data to ensure it returns the correct data for an order."""
-        Menu.objects.create(
-            first_course="Soup",
-            first_course_price=10,
-            second_course="Steak",
-            second_course_price=15,
-            dessert="Ice Cream",
-            dessert_price=5,
-            drink="Water",
-            drink_price=2,
-        )
+        save_menu([MENU_ROW])
         order = Order.objects.create(
             user=self.user,
             date=date.today(),
@@ -163,6 +151,29 @@ class CalculationTestCase(TestCase):
         self.assertEqual(data["first_course_quantity"], 2)
         self.assertEqual(data["first_course_price"], 10)
 
+    def test_get_order_data_does_not_query_prices(self):
+        """Test get_order_data to ensure prices come from the menu catalog index."""
+        save_menu([MENU_ROW])
+        order = Order(
+            user=self.user,
+            date=date.today(),
+            first_course="Soup",
+            first_course_quantity=1,
+            second_course="Steak",
+            second_course_quantity=1,
+            dessert=FormDefaultValues.DISH_NOT_CHOSEN_DEFAULT_VALUE,
+            drink="Water",
+            drink_quantity=3,
+        )
+        catalog = get_menu_catalog()
+
+        with self.assertNumQueries(0):
+            data = get_order_data(order, catalog=catalog)
+
+        self.assertEqual(data["second_course_price"], 15)
+        self.assertEqual(data["dessert_price"], 0)
+        self.assertEqual(data["drink_price"], 2)
+
 
 class UtilityTestCase(TestCase):
     def test_get_current_week_dates(self):
@@ -217,19 +228,11 @@ class FileValidationTestCase(TestCase):
 class MenuChoicesTestCase(TestCase):
     @classmethod
     def setUpTestData(cls):
-        cls.menu = Menu.objects.create(
-            first_course="Soup",
-            first_course_price=10,
-            second_course="Steak",
-            second_course_price=15,
-            dessert="Ice Cream",
-            dessert_price=5,
-            drink="Water",
-            drink_price=2,
-        )
+        cls.menu = MENU_ROW
+        save_menu([cls.menu])
 
     def tearDown(self):
-        Menu.objects.all().delete()
+        Dish.objects.all().delete()
 
     def test_get_menu_choices(self):
         """Test get_menu_choices to ensure correct choices are returned."""
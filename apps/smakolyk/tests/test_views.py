@@ -1,7 +1,528 @@
-"""
-It works... Just trust me... Really, It works. The reason you don't see any test here just because I'm done. Rly, I can't stand it anymore...
-I just hate writing tests and there is no more any point and motivation to continue writing this shit...
-Sry :(
+import json
+from datetime import date, timedelta
+from unittest.mock import patch
 
-P.S.: If there was a possibility you wanted to write tests in this file - you can!
-"""
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from apps.smakolyk.catalog import get_menu_catalog, save_menu
+from apps.smakolyk.models import Dish, History, Order, WeeklySpend
+from apps.smakolyk.storage import (
+    get_empty_history_data,
+    get_history_after,
+    record_weekly_spend,
+)
+from apps.smakolyk.utils import get_current_week_dates
+from apps.smakolyk.values import CacheSettingValues, ViewSettingValues
+from apps.smakolyk.views import HistoryView, OrderView, WeekTotalAmountAjaxView
+from apps.user.models import CustomUser
+
+from .values import MENU_ROW, TestValues
+
+
+class MenuEtagTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email=TestValues.email, password=TestValues.password
+        )
+        cls.menu = MENU_ROW
+        save_menu([cls.menu])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def tearDown(self):
+        Dish.objects.all().delete()
+        CustomUser.objects.all().delete()
+
+    def test_price_setter_returns_not_modified(self):
+        """Test that an unchanged menu is answered with 304 without any query."""
+        etag = self.client.get(reverse("smakolyk:set_price")).headers["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse("smakolyk:set_price"), HTTP_IF_NONE_MATCH=etag
+            )
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_price_setter_etag_changes_with_menu(self):
+        """Test that the ETag changes when the menu changes."""
+        etag = self.client.get(reverse("smakolyk:set_price")).headers["ETag"]
+        save_menu([{**self.menu, "drink_price": 3}])
+
+        response = self.client.get(
+            reverse("smakolyk:set_price"), HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["response"]["drink"]["Water"], 3)
+
+    def test_home_page_returns_not_modified(self):
+        """Test that the home page is answered with 304 for a matching ETag."""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("smakolyk:home"))
+
+        self.assertContains(response, "Soup")
+
+        # session and user, the menu isn't read even by a worker without a catalog
+        with patch("apps.smakolyk.catalog._catalog", None), self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("smakolyk:home"), HTTP_IF_NONE_MATCH=response.headers["ETag"]
+            )
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_home_page_etag_changes_after_first_order(self):
+        """Test that the cached history link state is dropped on a new order."""
+        self.client.force_login(self.user)
+        etag = self.client.get(reverse("smakolyk:home")).headers["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            record_weekly_spend(self.user.id, [date.today()], [10])
+
+        response = self.client.get(reverse("smakolyk:home"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, reverse("smakolyk:history"))
+
+    def test_home_page_etag_depends_on_user(self):
+        """Test that different users don't share the home page ETag."""
+        anonymous_etag = self.client.get(reverse("smakolyk:home")).headers["ETag"]
+        self.client.force_login(self.user)
+
+        self.assertNotEqual(
+            self.client.get(reverse("smakolyk:home")).headers["ETag"], anonymous_etag
+        )
+
+    def test_home_page_caches_menu_carousel(self):
+        """Test that the carousel fragment is cached under the menu digest."""
+        fragment_key = make_template_fragment_key(
+            CacheSettingValues.MENU_CAROUSEL_FRAGMENT_NAME,
+            [get_menu_catalog().digest],
+        )
+        cache.delete(fragment_key)
+
+        self.client.get(reverse("smakolyk:home"))
+
+        self.assertIn("Soup", cache.get(fragment_key))
+
+
+class OrderViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email=TestValues.email, password=TestValues.password
+        )
+        save_menu([MENU_ROW])
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        History.objects.all().delete()
+        Order.objects.all().delete()
+        Dish.objects.all().delete()
+        CustomUser.objects.all().delete()
+
+    @patch.object(OrderView, "is_weekend", return_value=False)
+    @patch("apps.smakolyk.forms.get_menu_choices")
+    def test_formset_shares_menu_choices(self, mock_get_menu_choices, _):
+        """Test that menu choices are computed once for the whole formset."""
+        response = self.client.get(reverse("smakolyk:order"))
+
+        self.assertContains(response, '<option value="Soup">Soup</option>', count=5)
+        mock_get_menu_choices.assert_not_called()
+
+    def get_week_order_data(self) -> dict:
+        """
+        Returns POST data of the order formset filled for every weekday
+        :return: dict
+        """
+        data = {
+            "form-TOTAL_FORMS": ViewSettingValues.FORMS_NUMBER,
+            "form-INITIAL_FORMS": 0,
+        }
+
+        for idx, date_ in enumerate(get_current_week_dates()):
+            data.update(
+                {
+                    f"form-{idx}-first_course": "Soup",
+                    f"form-{idx}-first_course_quantity": 1,
+                    f"form-{idx}-second_course": "Steak",
+                    f"form-{idx}-second_course_quantity": 1,
+                    f"form-{idx}-drink": "Water",
+                    f"form-{idx}-drink_quantity": 2,
+                    f"form-{idx}-date": date_.isoformat(),
+                }
+            )
+
+        return data
+
+    def test_week_order_rejected_when_already_ordered(self):
+        """Test that a second submission of the same week is rejected by the DB."""
+        data = self.get_week_order_data()
+        self.client.post(reverse("smakolyk:order"), data)
+
+        response = self.client.post(reverse("smakolyk:order"), data)
+
+        self.assertRedirects(
+            response, reverse("smakolyk:order_error"), fetch_redirect_response=False
+        )
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(History.objects.filter(user=self.user).count(), 5)
+
+    @patch.object(OrderView, "is_weekend", return_value=False)
+    def test_order_page_redirects_when_already_ordered(self, _):
+        """Test that the next week order is checked with one query."""
+        self.client.post(reverse("smakolyk:order"), self.get_week_order_data())
+        request = RequestFactory().get(reverse("smakolyk:order"))
+        request.user = self.user
+        view = OrderView()
+        view.setup(request)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(view.order_exists_for_the_next_week())
+
+        self.assertRedirects(
+            self.client.get(reverse("smakolyk:order")),
+            reverse("smakolyk:order_error"),
+            fetch_redirect_response=False,
+        )
+
+    def test_week_order_saved_in_bulk(self):
+        """Test that a five-day order is saved with a fixed number of queries."""
+        data = self.get_week_order_data()
+        get_menu_catalog()
+
+        # session, user, savepoint, orders insert, history insert, weekly spend
+        # insert and update, dish totals upsert, savepoint release
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse("smakolyk:order"), data)
+
+        self.assertRedirects(
+            response, reverse("smakolyk:order_success"), fetch_redirect_response=False
+        )
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(
+            list(
+                History.objects.filter(user=self.user).values_list(
+                    "total_amount", flat=True
+                )
+            ),
+            [29] * 5,
+        )
+        self.assertEqual(
+            list(
+                WeeklySpend.objects.filter(user=self.user).values_list(
+                    "total", "oversum", "days_ordered"
+                )
+            ),
+            [(29 * 5, 0, 5)],
+        )
+
+
+class WeekTotalAmountTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email=TestValues.email, password=TestValues.password
+        )
+        save_menu([{**MENU_ROW, "second_course_price": 150}])
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        Dish.objects.all().delete()
+        CustomUser.objects.all().delete()
+
+    def post_days(self, days: list[dict] | dict):
+        return self.client.post(
+            reverse("smakolyk:set_week_total_price"),
+            json.dumps({"days": days}),
+            content_type="application/json",
+        )
+
+    def test_week_totals_use_menu_prices(self):
+        """Test that totals of every day are computed with prices from the menu."""
+        response = self.post_days(
+            [
+                {"first_course": "Soup", "first_course_quantity": 2},
+                {"second_course": "Steak", "second_course_quantity": 2},
+                {},
+                {"drink": "Water", "drink_quantity": 1, "dessert_quantity": 3},
+                {"drink": "Juice", "drink_quantity": 1},
+            ]
+        )
+
+        self.assertEqual(
+            response.json()["response"],
+            [
+                {"total_amount": 20, "remaining_amount": 180, "amount_deducted": False},
+                {
+                    "total_amount": 300,
+                    "remaining_amount": -100,
+                    "amount_deducted": True,
+                },
+                {"total_amount": 0, "remaining_amount": 200, "amount_deducted": False},
+                {"total_amount": 2, "remaining_amount": 198, "amount_deducted": False},
+                {"total_amount": 0, "remaining_amount": 200, "amount_deducted": False},
+            ],
+        )
+
+    def test_week_totals_invalid_data(self):
+        """Test that invalid selections are rejected."""
+        self.assertEqual(
+            self.post_days(
+                [{"first_course": "Soup", "first_course_quantity": -1}]
+            ).status_code,
+            400,
+        )
+        self.assertEqual(self.post_days([{}] * 6).status_code, 400)
+
+    def test_week_totals_non_object_days(self):
+        """Test that days that aren't objects are rejected as invalid data."""
+        self.assertEqual(self.post_days([1, "x"]).status_code, 400)
+        self.assertEqual(self.post_days({"monday": 3}).status_code, 400)
+
+    def test_week_totals_non_integer_quantities(self):
+        """Test that quantities that aren't integers are rejected as invalid data."""
+        for quantity in ("1e400", "Infinity", "1.5", '"2"', "true"):
+            with self.subTest(quantity=quantity):
+                response = self.client.post(
+                    reverse("smakolyk:set_week_total_price"),
+                    f'{{"days": [{{"first_course_quantity": {quantity}}}]}}',
+                    content_type="application/json",
+                )
+
+                self.assertEqual(response.status_code, 400)
+
+    def test_week_totals_too_many_days_not_priced(self):
+        """Test that oversized payloads are rejected before any day is priced."""
+        with patch.object(WeekTotalAmountAjaxView, "_get_day_total") as get_day_total:
+            response = self.post_days([{}] * (ViewSettingValues.FORMS_NUMBER + 1))
+
+        self.assertEqual(response.json(), {"error": "Too many days"})
+        get_day_total.assert_not_called()
+
+
+class HistoryViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email=TestValues.email, password=TestValues.password
+        )
+        cls.other_user = CustomUser.objects.create_user(
+            email=f"other.{TestValues.email}", password=TestValues.password
+        )
+        save_menu([MENU_ROW])
+        cls.soup = Dish.objects.get(name="Soup")
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        History.objects.all().delete()
+        Dish.objects.all().delete()
+        CustomUser.objects.all().delete()
+
+    def create_history(self, user: CustomUser, date_) -> History:
+        return History.objects.create(
+            user=user,
+            date=date_,
+            first_course_dish=self.soup,
+            first_course_quantity=2,
+            total_amount=20,
+        )
+
+    def test_history_page_reads_week_in_one_query(self):
+        """Test that the week is read in one query and missing days are empty."""
+        current_week_days = HistoryView.get_current_week_days()
+        self.create_history(self.user, current_week_days[1])
+
+        # session, user, history
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("smakolyk:history"))
+
+        data = response.context["data"]
+        self.assertEqual(data["Monday"], get_empty_history_data(current_week_days[0]))
+        self.assertEqual(data["Monday"]["first_course"], "Not chosen")
+        self.assertEqual(data["Tuesday"]["first_course"], "Soup")
+        self.assertEqual(data["Tuesday"]["first_course_price"], 10)
+        self.assertEqual(data["Tuesday"]["drink"], "Not chosen")
+
+    def test_history_page_ignores_other_users(self):
+        """Test that the next week is shown until the user orders this week."""
+        current_week_days = HistoryView.get_current_week_days()
+        next_week_days = HistoryView.get_next_week_days()
+        self.create_history(self.other_user, current_week_days[0])
+        history = self.create_history(self.user, next_week_days[0])
+
+        response = self.client.get(reverse("smakolyk:history"))
+
+        self.assertEqual(response.context["data"]["Monday"]["date"], history.date)
+        self.assertEqual(
+            response.context["data"]["Monday"]["total_amount"], history.total_amount
+        )
+
+    def test_history_week_served_from_cache(self):
+        """Test that a week is read once and days without orders are filled."""
+        current_week_days = HistoryView.get_current_week_days()
+        self.create_history(self.user, current_week_days[0])
+        url = reverse("smakolyk:get_history_week")
+        params = {"date": current_week_days[2].isoformat()}
+
+        response = self.client.get(url, params)
+
+        # session, user
+        with self.assertNumQueries(2):
+            cached_response = self.client.get(url, params)
+
+        self.assertEqual(cached_response.content, response.content)
+        history_data = cached_response.json()["history_data"]
+        self.assertEqual(history_data["monday"]["first_course"], "Soup")
+        self.assertEqual(history_data["monday"]["total_amount"], 20)
+        self.assertEqual(history_data["friday"]["first_course"], "Not chosen")
+        self.assertEqual(
+            history_data["friday"]["date"], current_week_days[4].isoformat()
+        )
+
+    def test_history_week_without_weekly_spend(self):
+        """Test that a week without a spending summary has no week total."""
+        current_week_days = HistoryView.get_current_week_days()
+        self.create_history(self.user, current_week_days[0])
+
+        response = self.client.get(
+            reverse("smakolyk:get_history_week"),
+            {"date": current_week_days[0].isoformat()},
+        )
+
+        self.assertTrue(response.json()["date_exists"])
+        self.assertIsNone(response.json()["week_spend"])
+
+    def test_history_week_without_valid_date(self):
+        """Test that a missing or malformed date is answered without history."""
+        url = reverse("smakolyk:get_history_week")
+
+        for params in ({}, {"date": "2024-13-45"}, {"date": "monday"}):
+            response = self.client.get(url, params)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {"date_exists": False})
+
+    def test_history_week_cache_invalidated_on_write(self):
+        """Test that writing a day of the week drops the cached week."""
+        current_week_days = HistoryView.get_current_week_days()
+        url = reverse("smakolyk:get_history_week")
+        params = {"date": current_week_days[0].isoformat()}
+
+        self.assertFalse(self.client.get(url, params).json()["date_exists"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_history(self.user, current_week_days[3])
+
+        self.assertEqual(
+            self.client.get(url, params).json()["history_data"]["thursday"][
+                "total_amount"
+            ],
+            20,
+        )
+
+
+class HistoryApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email=TestValues.email, password=TestValues.password
+        )
+        cls.other_user = CustomUser.objects.create_user(
+            email=f"other.{TestValues.email}", password=TestValues.password
+        )
+        cls.dates = [date(2024, 1, 1) + timedelta(weeks=week) for week in range(7)]
+        # Two rows on the same date are ordered by id
+        cls.dates.append(cls.dates[3])
+        History.objects.bulk_create(
+            History(user=cls.user, date=date_, total_amount=number)
+            for number, date_ in enumerate(cls.dates)
+        )
+        History.objects.create(user=cls.other_user, date=cls.dates[0], total_amount=100)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        History.objects.all().delete()
+        CustomUser.objects.all().delete()
+
+    def get_page(self, **params):
+        return self.client.get(reverse("smakolyk:history_api"), params)
+
+    def test_history_pages_cover_history_newest_first(self):
+        """Test that pages follow each other without gaps or repeated rows."""
+        rows, cursor = list(), None
+
+        while True:
+            # session, user, history
+            with self.assertNumQueries(3):
+                page = self.get_page(limit=3, **({"cursor": cursor} if cursor else {}))
+
+            rows.extend(page.json()["rows"])
+
+            if not (cursor := page.json()["next_cursor"]):
+                break
+
+        fields = page.json()["fields"]
+        dates = [row[fields.index("date")] for row in rows]
+        totals = [row[fields.index("total_amount")] for row in rows]
+
+        self.assertEqual(
+            dates, sorted((date_.isoformat() for date_ in self.dates), reverse=True)
+        )
+        self.assertCountEqual(totals, range(len(self.dates)))
+        self.assertEqual(rows[-1][fields.index("first_course")], "Not chosen")
+
+    def test_history_page_sought_through_index(self):
+        """Test that a deep page starts reading the index at its cursor."""
+        cursor_row = History.objects.get(user=self.user, date=self.dates[1])
+        history = get_history_after(self.user.id, cursor_row.date, cursor_row.id)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_bitmapscan = off")
+
+        plan = history.explain(analyze=True)
+
+        self.assertIn("history_user_date_idx", plan)
+        # only the cursor row itself is read and skipped
+        self.assertIn("Rows Removed by Filter: 1\n", plan)
+        self.assertEqual([row.date for row in history], [self.dates[0]])
+
+    def test_history_page_size(self):
+        """Test that the default page size is used when it isn't set."""
+        page = self.get_page().json()
+
+        self.assertEqual(len(page["rows"]), len(self.dates))
+        self.assertIsNone(page["next_cursor"])
+
+    def test_history_page_invalid_params(self):
+        """Test that invalid page size and cursor are rejected."""
+        self.assertEqual(self.get_page(limit=0).status_code, 400)
+        self.assertEqual(self.get_page(limit="all").status_code, 400)
+        self.assertEqual(self.get_page(cursor="yesterday").status_code, 400)
+
+    def test_history_api_requires_login(self):
+        """Test that anonymous users are denied."""
+        self.client.logout()
+
+        self.assertEqual(self.get_page().status_code, 403)
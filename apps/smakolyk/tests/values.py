@@ -99,3 +99,16 @@ class TestValues:
     phone_number: str = _FAKER.phone_number()
     valid_phonenumber1: str = "+380970082875"
     valid_phonenumber2: str = "+380970082876"
+
+
+# A menu row in the uploaded file format
+MENU_ROW: dict = {
+    "first_course": "Soup",
+    "first_course_price": 10,
+    "second_course": "Steak",
+    "second_course_price": 15,
+    "dessert": "Ice Cream",
+    "dessert_price": 5,
+    "drink": "Water",
+    "drink_price": 2,
+}
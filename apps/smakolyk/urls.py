@@ -2,12 +2,13 @@ from django.urls import path
 from django.views.generic import TemplateView
 
 from .views import (
+    HistoryApiView,
     HistorySetterAjaxView,
     HistoryView,
     HomePageView,
     OrderView,
     PriceSetterAjaxView,
-    TotalAmountCounterAjaxView,
+    WeekTotalAmountAjaxView,
 )
 
 app_name = "smakolyk"
@@ -28,9 +29,12 @@ urlpatterns = [
     ),
     path("set-price/", PriceSetterAjaxView.as_view(), name="set_price"),
     path(
-        "set-total-price/", TotalAmountCounterAjaxView.as_view(), name="set_total_price"
+        "set-week-total-price/",
+        WeekTotalAmountAjaxView.as_view(),
+        name="set_week_total_price",
     ),
     path("history/", HistoryView.as_view(), name="history"),
+    path("history/api/", HistoryApiView.as_view(), name="history_api"),
     path("get-history-week/", HistorySetterAjaxView.as_view(), name="get_history_week"),
     path(
         "order-access-denied/",
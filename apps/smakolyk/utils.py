@@ -5,10 +5,12 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.core.mail import send_mail
+from django.http import HttpRequest
 
 from apps.user.models import CustomUser
 
-from .models import Menu, Order
+from .catalog import MenuCatalog, get_menu_catalog
+from .models import Order
 from .values import (
     DataMappingValues,
     EmailSenderTemplates,
@@ -101,22 +103,18 @@ def get_dish_price(dish_value: str = None, dish_type: str = None) -> int:
     :param dish_type: str = None
     :return: int
     """
-    if dish_value in (
-        dish_types := list(Menu.objects.values_list(f"{dish_type}", flat=True))
-    ):
-        index = dish_types.index(dish_value)
-
-        return (
-            list(Menu.objects.values_list(f"{dish_type}_price", flat=True))[index] or 0
-        )
+    if (price := get_menu_catalog().get_price(dish_type, dish_value)) is not None:
+        return price or 0
 
 
-def get_order_data(order: Order = None) -> dict:
+def get_order_data(order: Order = None, catalog: MenuCatalog = None) -> dict:
     """
     Returns data from a given Order object
     :param order: Order = None
+    :param catalog: MenuCatalog = None
     :return: dict
     """
+    catalog = catalog or get_menu_catalog()
     dish_quantities = {
         key: value or FormDefaultValues.DISH_QUANTIRY_NOT_CHOSEN_DEFAULT_VALUE
         for key, value in zip(
@@ -132,9 +130,7 @@ def get_order_data(order: Order = None) -> dict:
         for key, value in zip(
             DataMappingValues.dish_price_field_names,
             [
-                get_dish_price(
-                    dish_value=getattr(order, field_name), dish_type=field_name
-                )
+                catalog.get_price(field_name, getattr(order, field_name))
                 for field_name in DataMappingValues.dish_field_names
             ],
         )
@@ -265,16 +261,27 @@ def validate_dish_prices(data: pd.DataFrame) -> None:
                 )
 
 
+def get_menu_etag(request: HttpRequest, *args, **kwargs) -> str:
+    """
+    Returns an ETag of the current menu content
+    :param request: HttpRequest
+    :return: str
+    """
+    return get_menu_catalog().digest
+
+
 def get_menu_choices(field_name: str) -> tuple:
     """
     Returns a tuple of choices for `forms.ChoiceField` based on `field_name`.
     :param field_name: The field name to get choices for.
     :return: A tuple of choices for `forms.ChoiceField` based on `field_name`.
     """
-    return tuple(
-        [("", "Select a dish")]
-        + [
-            (value_, value_)
-            for value_ in Menu.objects.values_list(field_name, flat=True)
-        ]
-    )
+    return get_menu_catalog().get_choices(field_name)
+
+
+def get_all_menu_choices() -> dict[str, tuple]:
+    """
+    Returns choices for every dish field, so a whole formset can share them
+    :return: dict[str, tuple]
+    """
+    return get_menu_catalog().choices
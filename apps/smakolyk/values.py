@@ -1,11 +1,26 @@
-import os
 from dataclasses import dataclass
 
-from django.conf import settings
-
-OUTPUT_ORDERS_FILE_DIR = os.path.join(settings.BASE_DIR, "orders.xlsx")
+ORDERS_TABLE_NAME: str = "Orders"
+KITCHEN_SUMMARY_TABLE_NAME: str = "Summary"
+EXPORT_FILE_NAME: str = "{name}.{extension}"
+XLSX_MIMETYPE: str = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 ORDERS_SENT_CELERY_MESSAGE: str = "Orders sent"
+ORDERS_EXPORT_REFRESHED_CELERY_MESSAGE: str = "Orders export refreshed"
 MENU_UPLOADED_CELERY_MESSAGE: str = "Menu uploaded"
+OVERSUM_NOTIFIED_CELERY_MESSAGE: str = "Oversum notification sent"
+MENU_ARTIFACT_DIR_NAME: str = "menu"
+MENU_ARTIFACT_FILE_NAME: str = "menu.{digest}.json"
+MENU_ARTIFACT_FILE_PATTERN: str = "menu.*.json"
+MENU_ARTIFACT_POINTER_FILE_NAME: str = "current.json"
+LEGACY_MENU_VERSION: int = 0
+# Key of the advisory lock held while a new menu version is saved
+MENU_VERSION_LOCK_ID: int = 8_271_001
+# Key of the advisory lock held while orders waiting for export are read or removed
+ORDERS_EXPORT_LOCK_ID: int = 8_271_002
+ISO_WEEK_FORMAT: str = "%G-W%V"
+ORDER_PARTITION_SUFFIX_FORMAT: str = "%G_w%V"
+ORDER_DEFAULT_PARTITION_SUFFIX: str = "default"
+ORDER_PARTITIONS_CREATED_CELERY_MESSAGE: str = "Order partitions created"
 
 
 @dataclass(frozen=True)
@@ -33,6 +48,8 @@ class ValidationValues:
     drink_min_length_value: int = 1
     drink_min_price_value: int = 1
     drink_quantity_default_value: int = 0
+    dish_name_max_length_value: int = 100
+    course_type_max_length_value: int = 20
 
     # Uploaded file validation values
     one_megabyte: int = 1_048_576
@@ -71,6 +88,8 @@ class ViewSettingValues:
     WEEKEND_START_HOUR: int = 18
     FORMS_NUMBER: int = 5
     MAX_ORDER_AMOUNT: int = 200  # in UAH
+    HISTORY_API_PAGE_SIZE: int = 50
+    HISTORY_API_MAX_PAGE_SIZE: int = 500
     MIN_ORDER_VALUE: int = 0
     WEEKDAY_NAMES: tuple[str, ...] = (
         "Monday",
@@ -128,6 +147,66 @@ class DataMappingValues:
         "dessert",
         "drink",
     )
+    history_dish_field_names: tuple[str, ...] = (
+        "first_course_dish",
+        "second_course_dish",
+        "dessert_dish",
+        "drink_dish",
+    )
+
+
+@dataclass(frozen=True)
+class CacheSettingValues:
+    MENU_VERSION_KEY: str = "smakolyk:menu:version"
+    MENU_CAROUSEL_FRAGMENT_NAME: str = "menu_carousel"
+    MENU_CAROUSEL_FRAGMENT_TIMEOUT: int = 60 * 60 * 24 * 7  # one week
+    # Bumped whenever the payload format changes, so old payloads aren't served
+    HISTORY_WEEK_KEY: str = "smakolyk:history:v2:{user_id}:{iso_week}"
+    HISTORY_WEEK_TIMEOUT: int = 60 * 60 * 24 * 30  # one month
+    HAS_ORDERS_KEY: str = "smakolyk:has_orders:{user_id}"
+    HAS_ORDERS_TIMEOUT: int = 60 * 60 * 24 * 30  # one month
+    ORDERS_EXPORT_KEY: str = "smakolyk:orders:export"
+    ORDERS_EXPORT_TIMEOUT: int = 60 * 60 * 24 * 7  # one week
+    NO_TIMEOUT: None = None
+
+
+@dataclass(frozen=True)
+class TaskSettingValues:
+    EMAIL_MAX_RETRIES: int = 5
+    EMAIL_RETRY_BACKOFF_MAX: int = 60 * 10  # in seconds
+    EXPORT_CHUNK_SIZE: int = 2000
+    ORDER_PARTITION_WEEKS_AHEAD: int = 4
+    ORDER_EXPORT_COLUMNS: tuple[str, ...] = (
+        "names",
+        "first_course",
+        "first_course_quantity",
+        "second_course",
+        "second_course_quantity",
+        "dessert",
+        "dessert_quantity",
+        "drink",
+        "drink_quantity",
+        "date",
+    )
+
+
+@dataclass(frozen=True)
+class ReportSettingValues:
+    CHUNK_SIZE: int = 2000
+    MONTH_FORMAT: str = "%Y-%m"
+    FORMATS: tuple[str, ...] = ("csv", "xlsx")
+    DEDUCTION_REPORT_FILE_NAME: str = "deductions.{format}"
+    DEDUCTION_REPORT_SHEET_NAME: str = "Deductions"
+    KITCHEN_SUMMARY_COLUMNS: tuple[str, ...] = ("date", "course", "dish", "quantity")
+    DEDUCTION_REPORT_COLUMNS: tuple[str, ...] = (
+        "month",
+        "email",
+        "first_name",
+        "last_name",
+        "days_ordered",
+        "total_amount",
+        "deduction",
+    )
 
 
 @dataclass(frozen=True)
@@ -160,3 +239,5 @@ class ValidationMessages:
         "Minimal price is {minimal_price}."
     )
     EMPTY_DISH_NAME: str = "The value in the column '{field}' cannot be empty!"
+    DUPLICATE_ORDER_DATES: str = "Every day of the week can be ordered only once!"
+    DIFFERENT_ORDER_WEEKS: str = "All orders must be made for the same week!"
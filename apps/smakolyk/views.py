@@ -3,52 +3,73 @@ from datetime import date, datetime, timedelta
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError
 from django.forms import formset_factory
 from django.http import (
+    HttpResponse,
     HttpResponseBadRequest,
     HttpResponsePermanentRedirect,
     HttpResponseRedirect,
     JsonResponse,
 )
-from django.shortcuts import get_object_or_404, redirect, render
+from django.shortcuts import redirect, render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
 from django.views import View
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.views.generic import CreateView, TemplateView
 
-from apps.user.models import CustomUser
-
-from .forms import OrderForm
-from .models import History, Menu, Order
+from .catalog import MenuCatalog, get_menu_catalog, get_menu_version
+from .forms import OrderForm, OrderFormSet
+from .models import Order
+from .storage import (
+    get_history_page,
+    get_week_history,
+    get_week_history_data,
+    get_week_history_payload,
+    is_week_ordered,
+    user_has_orders,
+)
+from .tasks import enqueue_oversum_notifications
 from .utils import (
+    get_all_menu_choices,
     get_current_week_dates,
     get_dates_dict,
     get_days_dict,
-    notify_about_oversum,
+    get_menu_etag,
 )
-from .values import DataMappingValues, ViewSettingValues
+from .values import CacheSettingValues, DataMappingValues, ViewSettingValues
 
 
 class HomePageView(CreateView):
     template_name = "home.html"
 
     def get(self, request, *args, **kwargs):
-        menu: dict[str, list] = dict()
+        # The ETag is built from cached values only, so a 304 needs no menu query
+        has_order = request.user.is_authenticated and user_has_orders(request.user.id)
+        etag = quote_etag(f"{get_menu_version()}-{request.user.id}-{int(has_order)}")
+
+        if (response := get_conditional_response(request, etag=etag)) is None:
+            catalog = get_menu_catalog()
+            response = render(
+                request,
+                self.template_name,
+                {
+                    # The carousel is rendered once per menu and then read
+                    # from the fragment cache, see `home.html`
+                    "menu": catalog.carousel,
+                    "menu_digest": catalog.digest,
+                    "menu_fragment_timeout": CacheSettingValues.MENU_CAROUSEL_FRAGMENT_TIMEOUT,
+                    "has_order": has_order,
+                },
+            )
 
-        for field_name in DataMappingValues.dish_field_names:
-            dishes = Menu.objects.values_list(field_name, flat=True)
-            # Splitting dishes into chunks
-            menu[field_name] = [
-                dishes[i : i + ViewSettingValues.CHUNK_MENU_SIZE]
-                for i in range(0, len(dishes), ViewSettingValues.CHUNK_MENU_SIZE)
-            ]
+        response.headers["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
 
-        return render(
-            request,
-            self.template_name,
-            {
-                "menu": menu,
-                "has_order": History.objects.filter(user_id=request.user.id).exists(),
-            },
-        )
+        return response
 
 
 class OrderView(LoginRequiredMixin, CreateView):
@@ -58,6 +79,7 @@ class OrderView(LoginRequiredMixin, CreateView):
     model = Order
     formset = formset_factory(
         form=OrderForm,
+        formset=OrderFormSet,
         extra=ViewSettingValues.FORMS_NUMBER,
     )
 
@@ -65,7 +87,7 @@ class OrderView(LoginRequiredMixin, CreateView):
         if result := self.check_page_accessibility():
             return result
 
-        formset = self.formset()
+        formset = self.formset(form_kwargs=self.get_formset_form_kwargs())
         days = get_days_dict()
 
         return render(
@@ -78,18 +100,23 @@ class OrderView(LoginRequiredMixin, CreateView):
         formset = self.formset(
             request.POST,
             initial=[{"user": request.user}] * ViewSettingValues.FORMS_NUMBER,
+            form_kwargs=self.get_formset_form_kwargs(),
         )
 
         if formset.is_valid():
-            for form in formset:
-                order, order_data, total_amount = form.save()
+            try:
+                saved_orders = formset.save()
+            except IntegrityError:
+                # The unique constraint rejects a week that's already been ordered
+                return redirect("smakolyk:order_error")
 
-                if total_amount > ViewSettingValues.MAX_ORDER_AMOUNT:
-                    user = get_object_or_404(CustomUser, id=request.user.id)
-                    oversum = total_amount - ViewSettingValues.MAX_ORDER_AMOUNT
+            for order, order_data, total_amount in saved_orders:
 
-                    notify_about_oversum(
-                        user=user, oversum=oversum, order_date=order.date
+                if total_amount > ViewSettingValues.MAX_ORDER_AMOUNT:
+                    enqueue_oversum_notifications(
+                        user_id=request.user.id,
+                        order_date=order.date,
+                        oversum=total_amount - ViewSettingValues.MAX_ORDER_AMOUNT,
                     )
 
             return redirect(self.success_url)
@@ -101,6 +128,14 @@ class OrderView(LoginRequiredMixin, CreateView):
             context={"formset": formset, "days": get_days_dict(), **get_dates_dict()},
         )
 
+    @staticmethod
+    def get_formset_form_kwargs() -> dict:
+        """
+        Returns kwargs shared by every form of the formset
+        :return: dict
+        """
+        return {"menu_choices": get_all_menu_choices()}
+
     def check_page_accessibility(
         self,
     ) -> None | HttpResponsePermanentRedirect | HttpResponseRedirect:
@@ -119,13 +154,7 @@ class OrderView(LoginRequiredMixin, CreateView):
         Check if order exists for current week
         :return: bool
         """
-        dates = get_current_week_dates()
-
-        for date_ in dates:
-            if Order.objects.filter(date=date_, user_id=self.request.user.id).exists():
-                return True
-
-        return False
+        return is_week_ordered(self.request.user.id, get_current_week_dates())
 
     @staticmethod
     def is_weekend() -> bool:
@@ -139,65 +168,79 @@ class OrderView(LoginRequiredMixin, CreateView):
         )
 
 
+@method_decorator(cache_control(no_cache=True), name="get")
+@method_decorator(condition(etag_func=get_menu_etag), name="get")
 class PriceSetterAjaxView(View):
     def get(self, request, *args, **kwargs):
-        menu = dict()
-
-        for dish_field_name, dish_price_field_name in zip(
-            DataMappingValues.dish_field_names, DataMappingValues.dish_price_field_names
-        ):
-            menu.update({dish_field_name: dict()})
-
-            for dish, price in zip(
-                list(Menu.objects.values_list(dish_field_name, flat=True)),
-                list(Menu.objects.values_list(dish_price_field_name, flat=True)),
-            ):
-                menu[dish_field_name].update({dish: price})
-
-        return JsonResponse({"response": menu})
+        return JsonResponse({"response": get_menu_catalog().prices})
 
 
-class TotalAmountCounterAjaxView(View):
+class WeekTotalAmountAjaxView(View):
     total_amount = ViewSettingValues.MAX_ORDER_AMOUNT
 
     def post(self, request, *args, **kwargs):
-
         try:
-            data = json.loads(request.body)
-        except json.JSONDecodeError:
+            days = json.loads(request.body)["days"]
+
+            # Checked before pricing, so an oversized payload costs nothing
+            if len(days) > ViewSettingValues.FORMS_NUMBER:
+                return JsonResponse(
+                    {"error": "Too many days"},
+                    status=HttpResponseBadRequest.status_code,
+                )
+
+            catalog = get_menu_catalog()
+            day_totals = [self._get_day_total(day, catalog) for day in days]
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
             return JsonResponse(
-                {"error": "Invalid JSON"}, status=HttpResponseBadRequest.status_code
+                {"error": "Invalid data"}, status=HttpResponseBadRequest.status_code
             )
 
-        dish_quantities = [
-            self._get_value(field_name, data)
-            for field_name in DataMappingValues.dish_quantity_field_names
-        ]
-        dish_prices = [
-            self._get_value(field_name, data)
-            for field_name in DataMappingValues.dish_price_field_names
-        ]
-
-        result = self.total_amount - sum(
-            [price * quantity for price, quantity in zip(dish_prices, dish_quantities)]
-        )
-
         return JsonResponse(
             {
-                "response": result,
-                "amount_deducted": result < ViewSettingValues.MIN_ORDER_VALUE,
+                "response": [
+                    {
+                        "total_amount": day_total,
+                        "remaining_amount": self.total_amount - day_total,
+                        "amount_deducted": self.total_amount - day_total
+                        < ViewSettingValues.MIN_ORDER_VALUE,
+                    }
+                    for day_total in day_totals
+                ]
             }
         )
 
     @staticmethod
-    def _get_value(field_name: str, data: dict) -> int:
+    def _get_day_total(day: dict, catalog: MenuCatalog) -> int:
         """
-        Get price from request.POST
-        :param field_name: str
-        :param data: dict
+        Returns total amount of one day's selection with prices from the menu catalog
+        :param day: dict
+        :param catalog: MenuCatalog
         :return: int
         """
-        return int(data.get(f"{field_name}", ViewSettingValues.MIN_ORDER_VALUE))
+        if not isinstance(day, dict):
+            raise TypeError(f"Day selection must be an object, not {type(day)}")
+
+        total = 0
+
+        for field_name, quantity_field_name in zip(
+            DataMappingValues.dish_field_names,
+            DataMappingValues.dish_quantity_field_names,
+        ):
+            quantity = day.get(quantity_field_name) or 0
+
+            # Floats such as 1e400 or Infinity can't be converted to int
+            if not isinstance(quantity, int) or isinstance(quantity, bool):
+                raise TypeError(f"Quantity of {field_name} must be an integer")
+
+            if quantity < ViewSettingValues.MIN_ORDER_VALUE:
+                raise ValueError(f"Negative quantity of {field_name}")
+
+            total += (
+                catalog.get_price(field_name, day.get(field_name)) or 0
+            ) * quantity
+
+        return total
 
 
 class HistoryView(TemplateView):
@@ -205,24 +248,20 @@ class HistoryView(TemplateView):
 
     def get(self, request, *args, **kwargs):
         current_week_days = self.get_current_week_days()
-
-        if History.objects.filter(date=next(iter(current_week_days))).exists():
-            data = {
-                weekday: History.objects.get(
-                    date=current_week_days[idx], user_id=request.user.id
-                )
-                for idx, weekday in enumerate(ViewSettingValues.WEEKDAY_NAMES)
-            }
-
+        next_week_days = self.get_next_week_days()
+        # Both weeks are read at once, the next one is shown until the current one
+        # has any orders
+        history = get_week_history(request.user.id, current_week_days + next_week_days)
+        current_week_history = history[: len(current_week_days)]
+        next_week_history = history[len(current_week_days) :]
+
+        if any(current_week_history):
+            week_data = get_week_history_data(current_week_days, current_week_history)
         else:
-            next_week_days = self.get_next_week_days()
+            week_data = get_week_history_data(next_week_days, next_week_history)
 
-            data = {
-                weekday: History.objects.get(
-                    date=next_week_days[idx], user_id=request.user.id
-                )
-                for idx, weekday in enumerate(ViewSettingValues.WEEKDAY_NAMES)
-            }
+        # Days without an order are filled like in `HistorySetterAjaxView`
+        data = dict(zip(ViewSettingValues.WEEKDAY_NAMES, week_data))
 
         return render(request, self.template_name, {"data": data})
 
@@ -253,37 +292,49 @@ class HistoryView(TemplateView):
 
 class HistorySetterAjaxView(View):
     def get(self, request, *args, **kwargs):
-        chosen_date = request.GET.get("date")
-
-        if not History.objects.filter(date=chosen_date).exists():
+        try:
+            chosen_date = datetime.strptime(request.GET["date"], "%Y-%m-%d").date()
+        except (KeyError, ValueError):
             return JsonResponse({"date_exists": False})
 
-        week_dates = self.get_dates_in_week(chosen_date)
-        history_data = dict()
+        return HttpResponse(
+            get_week_history_payload(request.user.id, chosen_date),
+            content_type="application/json",
+        )
 
-        for idx, weekday_name in enumerate(ViewSettingValues.WEEKDAY_NAMES):
-            history_object = History.objects.filter(
-                date=week_dates[idx], user_id=request.user.id
-            ).first()
-            history_data[weekday_name.lower()] = dict()
 
-            for field_name in ViewSettingValues.HISTORY_OBJECT_FIELDS:
-                field_value = getattr(history_object, field_name)
+class HistoryApiView(LoginRequiredMixin, View):
+    raise_exception = True
 
-                history_data[weekday_name.lower()][field_name] = field_value
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = int(
+                request.GET.get("limit", ViewSettingValues.HISTORY_API_PAGE_SIZE)
+            )
 
-        return JsonResponse({"history_data": history_data, "date_exists": True})
+            if not 0 < limit <= ViewSettingValues.HISTORY_API_MAX_PAGE_SIZE:
+                raise ValueError(limit)
 
-    @staticmethod
-    def get_dates_in_week(date_: str) -> list[str]:
-        """
-        Returns a list of dates that are present in the same week with `date_`
-        :param date_: str
-        :return: list[str]
-        """
-        formated_date = datetime.strptime(date_, "%Y-%m-%d").date()
-        start_of_week = formated_date - timedelta(days=formated_date.weekday())
+            rows, next_cursor = get_history_page(
+                request.user.id, request.GET.get("cursor"), limit
+            )
+        except ValueError:
+            return JsonResponse(
+                {"error": "Invalid data"}, status=HttpResponseBadRequest.status_code
+            )
 
-        return [
-            (start_of_week + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(5)
-        ]
+        # Rows are lists of values in the order of `fields` to keep pages small
+        return JsonResponse(
+            {
+                "fields": ViewSettingValues.HISTORY_OBJECT_FIELDS,
+                "rows": [
+                    [
+                        getattr(history_object, field_name)
+                        for field_name in ViewSettingValues.HISTORY_OBJECT_FIELDS
+                    ]
+                    for history_object in rows
+                ],
+                "next_cursor": next_cursor,
+            },
+            json_dumps_params={"separators": (",", ":")},
+        )
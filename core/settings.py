@@ -118,6 +118,10 @@ EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 # Site management settings
 ACCOUNTANT = os.environ.get("ACCOUNTANT", "")
 ORDERS_RECEIVER = os.environ.get("ORDERS_RECEIVER", "")
+# Stores a user's week as one `WeeklyOrder` row instead of five Order and History rows
+WEEKLY_ORDER_STORAGE = os.environ.get("WEEKLY_ORDER_STORAGE", "False") == "True"
+# Format of the files sent to `ORDERS_RECEIVER`: xlsx, csv or parquet
+ORDERS_EXPORT_FORMAT = os.environ.get("ORDERS_EXPORT_FORMAT", "xlsx")
 
 # Celery settings
 REDIS_IP = os.environ.get("CELERY_BROKER_IP", "redis")
@@ -127,5 +131,28 @@ CELERY_BEAT_SCHEDULE = {
     "send_orders_task": {
         "task": "apps.smakolyk.tasks.send_orders_task",
         "schedule": crontab(hour=18, minute=0, day_of_week="fri"),
+    },
+    # Keeps the orders export built during the week, it's only rebuilt if
+    # orders changed. It waits for `send_orders_task` when both run on Friday
+    "refresh_orders_export_task": {
+        "task": "apps.smakolyk.tasks.refresh_orders_export_task",
+        "schedule": crontab(minute="*/15", day_of_week="mon-fri"),
+    },
+    # Orders of the sent week are dropped with their partitions on Friday
+    "create_order_partitions_task": {
+        "task": "apps.smakolyk.tasks.create_order_partitions_task",
+        "schedule": crontab(hour=0, minute=0, day_of_week="sat"),
+    },
+}
+
+# Cache settings
+# Tests run with `django.core.cache.backends.locmem.LocMemCache`, so they never
+# touch keys of the running site
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.redis.RedisCache"
+        ),
+        "LOCATION": f"redis://{REDIS_IP}:6379/1",
     }
 }
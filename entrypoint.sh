@@ -8,7 +8,7 @@ echo "Loading fixtures"
 python manage.py loaddata ./apps/smakolyk/fixtures/first_menu.json
 
 export DJANGO_TEST_DB_REMOVAL=yes
-if python manage.py test --failfast --no-input; then
+if CACHE_BACKEND=django.core.cache.backends.locmem.LocMemCache python manage.py test --failfast --no-input; then
     echo "------------------------------------------------------"
     echo " Django tests passed"
     echo "------------------------------------------------------"